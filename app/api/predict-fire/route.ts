@@ -44,20 +44,33 @@ export async function POST(request: NextRequest) {
 }
 
 // GET endpoint for report/analysis
-export async function GET() {
+// The ML server serves a periodically refreshed snapshot with an ETag, so
+// browser revalidations are passed through and answered with 304 when unchanged
+export async function GET(request: NextRequest) {
     try {
-        const response = await fetch(`${ML_SERVER_URL}/report/fire`, { cache: 'no-store' });
+        const months = request.nextUrl.searchParams.get('months');
+        const query = months ? `?months=${encodeURIComponent(months)}` : '';
+        const ifNoneMatch = request.headers.get('if-none-match');
+        const response = await fetch(`${ML_SERVER_URL}/report/fire${query}`, {
+            cache: 'no-store',
+            headers: ifNoneMatch ? { 'If-None-Match': ifNoneMatch } : {},
+        });
+
+        const validators: Record<string, string> = { 'Cache-Control': 'no-cache' };
+        const etag = response.headers.get('etag');
+        const lastModified = response.headers.get('last-modified');
+        if (etag) validators['ETag'] = etag;
+        if (lastModified) validators['Last-Modified'] = lastModified;
 
+        if (response.status === 304) {
+            return new NextResponse(null, { status: 304, headers: validators });
+        }
         if (!response.ok) {
             throw new Error('ML model server error or report missing');
         }
 
         const report = await response.json();
-        return NextResponse.json(report, {
-            headers: {
-                'Cache-Control': 'no-store, max-age=0',
-            },
-        });
+        return NextResponse.json(report, { headers: validators });
     } catch (error) {
         return NextResponse.json(
             { error: 'Failed to fetch fire analysis report' },
@@ -0,0 +1,33 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+// ML Model Server URL (Python Flask server)
+const ML_SERVER_URL = process.env.ML_SERVER_URL || 'http://localhost:5000';
+
+// Proxies XYZ fire-risk tiles (/risk/tiles/{z}/{x}/{y}.png) so map layers can load them same-origin
+export async function GET(
+    request: NextRequest,
+    { params }: { params: Promise<{ z: string; x: string; y: string }> }
+) {
+    const { z, x, y } = await params;
+    const time = request.nextUrl.searchParams.get('time');
+    const query = time ? `?time=${encodeURIComponent(time)}` : '';
+
+    try {
+        const response = await fetch(
+            `${ML_SERVER_URL}/risk/tiles/${z}/${x}/${y.replace(/\.png$/, '')}.png${query}`
+        );
+        if (!response.ok) {
+            return new NextResponse(null, { status: response.status });
+        }
+
+        return new NextResponse(await response.arrayBuffer(), {
+            headers: {
+                'Content-Type': 'image/png',
+                'Cache-Control': response.headers.get('Cache-Control') || 'public, max-age=3600',
+            },
+        });
+    } catch (error) {
+        console.error('Fire risk tile error:', error);
+        return new NextResponse(null, { status: 503 });
+    }
+}
@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Days NASA POWER must cover before a year's (or month's) aggregates are trusted
+MIN_DAYS_PER_YEAR = 330
+MIN_DAYS_PER_MONTH = 25
+# IMD "very heavy rainfall" threshold (mm/day)
+HEAVY_RAIN_MM = 64.5
+# Columns of annual_climate(); an empty frame with these stands in when there is no daily table
+ANNUAL_COLUMNS = ["year", "avg_temp", "max_temp", "min_temp", "annual_rainfall", "max_daily_rain",
+                  "heavy_rain_days", "temp_anomaly_z", "rain_anomaly_z"]
+
+# Long-run values used for years the POWER series does not cover
+FALLBACK_AVG_TEMP = {2015: 26.5, 2016: 26.8, 2017: 27.2, 2018: 27.0, 2019: 27.5,
+                     2020: 27.9, 2021: 28.1, 2022: 28.3, 2023: 28.5, 2024: 28.8}
+FALLBACK_ANNUAL_RAINFALL = {2015: 1800, 2016: 1950, 2017: 2100, 2018: 1750, 2019: 2300,
+                            2020: 2500, 2021: 1900, 2022: 2000, 2023: 2150, 2024: 2200}
+# Cyclones making landfall near the Sundarbans; not observable from POWER, so always from this record
+CYCLONE_FREQUENCY = {2015: 1, 2016: 0, 2017: 1, 2018: 1, 2019: 2,
+                     2020: 3, 2021: 1, 2022: 1, 2023: 2, 2024: 2}  # Higher in 2020 (Amphan)
+
+
+def _aggregate(daily, freq):
+    """Resample the daily (t2m, prectotcorr) frame to `freq` in one pass."""
+    series = daily.set_index("date")[["t2m", "prectotcorr"]].astype("float64")
+    agg = series.resample(freq).agg({"t2m": ["mean", "max", "min", "count"], "prectotcorr": ["sum", "max"]})
+    agg.columns = ["avg_temp", "max_temp", "min_temp", "days", "rainfall", "max_daily_rain"]
+    agg["heavy_rain_days"] = (series["prectotcorr"] >= HEAVY_RAIN_MM).resample(freq).sum()
+    return agg
+
+
+def _zscore(values, groups=None):
+    if groups is None:
+        mean, std = values.mean(), values.std()
+    else:
+        grouped = values.groupby(groups)
+        mean, std = grouped.transform("mean"), grouped.transform("std")
+    return ((values - mean) / std).replace([np.inf, -np.inf], np.nan)
+
+
+def annual_climate(daily):
+    """Annual climate features from daily POWER data, one row per complete year."""
+    agg = _aggregate(daily, "YS")
+    agg = agg[agg["days"] >= MIN_DAYS_PER_YEAR].rename(columns={"rainfall": "annual_rainfall"})
+    agg["temp_anomaly_z"] = _zscore(agg["avg_temp"])
+    agg["rain_anomaly_z"] = _zscore(agg["annual_rainfall"])
+    agg.index = agg.index.year.rename("year")
+    return agg.drop(columns="days").reset_index()
+
+
+def monthly_climate(daily):
+    """Monthly climate features; anomalies are relative to the same calendar month."""
+    agg = _aggregate(daily, "MS")
+    agg = agg[agg["days"] >= MIN_DAYS_PER_MONTH].rename(columns={"rainfall": "monthly_rainfall"})
+    months = agg.index.month
+    agg["temp_anomaly_z"] = _zscore(agg["avg_temp"], months)
+    agg["rain_anomaly_z"] = _zscore(agg["monthly_rainfall"], months)
+    return agg.drop(columns="days").rename_axis("month").reset_index()
+
+
+def cached_climate_features(load_daily, source_hash, cache_dir):
+    """(annual, monthly) features, recomputed only when the source table's hash changes.
+
+    `load_daily` is only called on a cache miss, so re-runs skip reading the
+    daily table entirely.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = source_hash[:16]
+    annual_path = os.path.join(cache_dir, f"climate_annual_{key}.parquet")
+    monthly_path = os.path.join(cache_dir, f"climate_monthly_{key}.parquet")
+    if os.path.exists(annual_path) and os.path.exists(monthly_path):
+        return pd.read_parquet(annual_path), pd.read_parquet(monthly_path)
+
+    daily = load_daily()
+    annual, monthly = annual_climate(daily), monthly_climate(daily)
+    for name in os.listdir(cache_dir):
+        if name.startswith(("climate_annual_", "climate_monthly_")):
+            os.remove(os.path.join(cache_dir, name))
+    annual.to_parquet(annual_path, index=False)
+    monthly.to_parquet(monthly_path, index=False)
+    return annual, monthly
+
+
+def yearly_features(years, annual):
+    """avg_temp / annual_rainfall / cyclone_frequency (plus extremes) for `years`.
+
+    Years covered by POWER use the observed aggregates; the rest fall back
+    to the year-keyed long-run tables, or to their mean for years missing
+    from those too.
+    """
+    out = pd.DataFrame({"year": np.asarray(years, dtype="int64")})
+    # Missing columns (e.g. no climate table at all) are filled like unobserved years
+    annual = annual.reindex(columns=list(dict.fromkeys(ANNUAL_COLUMNS + list(annual.columns))))
+    annual["year"] = annual["year"].astype("int64")
+    out = out.merge(annual, on="year", how="left")
+    for column, fallback in [("avg_temp", FALLBACK_AVG_TEMP), ("annual_rainfall", FALLBACK_ANNUAL_RAINFALL)]:
+        default = out["year"].map(fallback).fillna(np.mean(list(fallback.values())))
+        out[column] = out[column].fillna(default)
+    # No observation means no known anomaly
+    out[["temp_anomaly_z", "rain_anomaly_z"]] = out[["temp_anomaly_z", "rain_anomaly_z"]].fillna(0.0)
+    out["cyclone_frequency"] = out["year"].map(CYCLONE_FREQUENCY).fillna(
+        round(np.mean(list(CYCLONE_FREQUENCY.values())))).astype("int64")
+    return out
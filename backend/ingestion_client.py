@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ConditionalCache:
+    """On-disk store of ETag / Last-Modified validators and bodies, keyed by URL.
+
+    Only URLs requested since the last save are written back, so entries for
+    queries that are no longer made drop out instead of piling up.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._entries = {}
+        self._used = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable HTTP cache {path}: {e}")
+
+    def headers(self, url):
+        with self._lock:
+            self._used.add(url)
+        entry = self._entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def body(self, url):
+        entry = self._entries.get(url)
+        return entry["body"] if entry else None
+
+    def store(self, url, response, body):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._used.add(url)
+            self._entries[url] = {"etag": etag, "last_modified": last_modified, "body": body}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._entries = {url: entry for url, entry in self._entries.items() if url in self._used}
+            self._used = set()
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class AsyncFetcher:
+    """Concurrent JSON fetcher over one pooled requests.Session.
+
+    Requests run on a bounded thread pool driven from asyncio, at most
+    `per_host` at a time per upstream host. The pool's `max_workers` threads
+    carry every request, so they also cap concurrency across all hosts:
+    size it to per_host x the number of hosts for the per-host limits to be
+    the only bound. Timeouts, connection errors,
+    429 and 5xx responses are retried with exponential backoff plus jitter
+    (honouring Retry-After), and responses carrying ETag/Last-Modified are
+    revalidated with conditional requests on later runs. Pass cache=False
+    for URLs that change every run (e.g. a date window ending today); their
+    validators are never reused, so storing their bodies only grows the cache.
+    """
+
+    def __init__(self, per_host=4, max_workers=32, retries=3, backoff=0.5, max_backoff=30.0,
+                 cache_path=None):
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = ConditionalCache(cache_path)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._host_limits = {}
+        self.stats = {"requests": 0, "retries": 0, "not_modified": 0, "failures": 0}
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    def _delay(self, attempt, response=None):
+        if response is not None and response.headers.get("Retry-After"):
+            retry_after = response.headers["Retry-After"]
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                try:
+                    wait = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                    return min(max(wait, 0.0), self.max_backoff)
+                except (TypeError, ValueError):
+                    pass
+        return min(self.backoff * (2 ** attempt), self.max_backoff) * random.uniform(0.5, 1.5)
+
+    def _get(self, url, timeout, cache):
+        response = self.session.get(url, headers=self.cache.headers(url) if cache else {}, timeout=timeout)
+        if response.status_code == 304 and (not cache or self.cache.body(url) is None):
+            # Nothing cached to reuse (e.g. the entry was pruned); ask for the full body
+            response = self.session.get(url, timeout=timeout)
+        return response
+
+    async def get_json(self, url, timeout=10, cache=True):
+        """GET `url` and decode JSON; returns None once retries are exhausted."""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(url):
+            for attempt in range(self.retries + 1):
+                response = None
+                try:
+                    self.stats["requests"] += 1
+                    response = await loop.run_in_executor(self._executor, self._get, url, timeout, cache)
+                    if response.status_code == 304 and cache and self.cache.body(url) is not None:
+                        self.stats["not_modified"] += 1
+                        return self.cache.body(url)
+                    if response.status_code == 200:
+                        body = response.json()
+                        if cache:
+                            self.cache.store(url, response, body)
+                        return body
+                    if response.status_code not in RETRY_STATUSES:
+                        print(f"Request failed ({response.status_code}): {url}")
+                        break
+                except (requests.RequestException, ValueError) as e:
+                    print(f"Request error for {url}: {e}")
+
+                if attempt < self.retries:
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self._delay(attempt, response))
+
+        self.stats["failures"] += 1
+        return None
+
+    def close(self):
+        self.cache.save()
+        self._executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLIMATOLOGY_PATH = os.path.join(SCRIPT_DIR, "fire_climatology.npz")
+
+STATS = ["mean", "p10", "p50", "p90"]
+QUANTILES = [0.1, 0.5, 0.9]
+
+# Regions the ERA5 cube (21.5-22.5N, 88-89E) covers: fire_service's
+# Sundarbans region and the Sundarbans zones used in the training report.
+# Its Western Ghats and Central India points lie outside the cube, so their
+# forecasts keep the default profiles (reported as forecast_profile="default").
+CLIMATOLOGY_REGIONS = [
+    {"name": "Sundarbans", "bbox": (21.5, 22.5, 88.0, 89.0)},
+    {"name": "West Sundarbans", "bbox": (21.5, 22.5, 88.0, 88.33)},
+    {"name": "Central Sundarbans", "bbox": (21.5, 22.5, 88.33, 88.66)},
+    {"name": "East Sundarbans", "bbox": (21.5, 22.5, 88.66, 89.0)},
+]
+# Share of a region's box that must lie inside a cube for its climatology to be built
+MIN_COVERAGE = 0.5
+
+
+def coverage(ds, bbox):
+    """Fraction of `bbox` (lat_min, lat_max, lon_min, lon_max) inside the cube's extent."""
+    from env_sampling import LAT_NAMES, LON_NAMES, find_coord
+
+    lats = ds[find_coord(ds, LAT_NAMES)].values
+    lons = ds[find_coord(ds, LON_NAMES)].values
+    lat_min, lat_max, lon_min, lon_max = bbox
+    lat_overlap = max(0.0, min(lat_max, lats.max()) - max(lat_min, lats.min()))
+    lon_overlap = max(0.0, min(lon_max, lons.max()) - max(lon_min, lons.min()))
+    return lat_overlap * lon_overlap / ((lat_max - lat_min) * (lon_max - lon_min))
+
+
+def build_climatology(datasets, regions=CLIMATOLOGY_REGIONS):
+    """Aggregate ERA5 monthly cubes into per-region, per-calendar-month statistics.
+
+    For every region the variables are averaged over the region's box, then
+    grouped by calendar month across all years. Returns a dict of arrays:
+    values has shape (regions, 12, variables, stats). Regions with less than
+    MIN_COVERAGE of their box inside every cube are left out of the table,
+    so fire_service falls back to its default profiles for them.
+    """
+    from env_data import window
+    from env_sampling import LAT_NAMES, LON_NAMES, TIME_NAMES, find_coord
+
+    covered = []
+    for region in regions:
+        share = min(coverage(ds, region["bbox"]) for ds in datasets)
+        if share < MIN_COVERAGE:
+            print(f"Skipping {region['name']}: {share:.0%} of its box is inside the ERA5 grid")
+        else:
+            covered.append(region)
+    regions = covered
+
+    variables = []
+    for ds in datasets:
+        variables.extend(v for v in ds.data_vars if v not in variables)
+    values = np.full((len(regions), 12, len(variables), len(STATS)), np.nan, dtype=np.float32)
+
+    for ds in datasets:
+        time_name = find_coord(ds, TIME_NAMES)
+        spatial = [d for d in (find_coord(ds, LAT_NAMES), find_coord(ds, LON_NAMES)) if d]
+        for r, region in enumerate(regions):
+            sub = window(ds, bbox=region["bbox"])
+            if any(sub.sizes[d] == 0 for d in spatial):
+                continue
+            for var in ds.data_vars:
+                da = sub[var]
+                if 'expver' in da.dims:
+                    da = da.isel(expver=0)
+                series = da.mean(dim=spatial).load()
+                by_month = series.groupby(f"{time_name}.month")
+                months = by_month.mean().coords["month"].values - 1
+                v = variables.index(var)
+                values[r, months, v, 0] = by_month.mean().values
+                values[r, months, v, 1:] = by_month.quantile(QUANTILES).transpose("month", "quantile").values
+
+    return {
+        "regions": np.array([r["name"] for r in regions]),
+        "variables": np.array(variables),
+        "stats": np.array(STATS),
+        "values": values,
+    }
+
+
+def save_climatology(table, path=CLIMATOLOGY_PATH):
+    np.savez(path, **table)
+    print(f"Climatology saved to {path} ({os.path.getsize(path)} bytes)")
+
+
+class Climatology:
+    """In-memory view of the precomputed climatology table with O(1) lookups."""
+
+    def __init__(self, table=None):
+        table = table or {}
+        self.values = table.get("values")
+        self._regions = {str(n): i for i, n in enumerate(table.get("regions", []))}
+        self._variables = {str(n): i for i, n in enumerate(table.get("variables", []))}
+        self._stats = {str(n): i for i, n in enumerate(table.get("stats", []))}
+
+    @classmethod
+    def load(cls, path=CLIMATOLOGY_PATH):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with np.load(path) as data:
+                return cls({k: data[k] for k in data.files})
+        except Exception as e:
+            print(f"Error loading climatology {path}: {e}")
+            return cls()
+
+    def __bool__(self):
+        return self.values is not None
+
+    def series(self, region, variable, stat="mean"):
+        """12 monthly values (January first) or None if not available."""
+        if self.values is None or region not in self._regions or variable not in self._variables:
+            return None
+        values = self.values[self._regions[region], :, self._variables[variable], self._stats[stat]]
+        return None if np.isnan(values).any() else values
+
+    def temp_offsets(self, region):
+        """Monthly 2 m temperature deviation from the annual mean (K == degC)."""
+        t2m = self.series(region, "t2m")
+        return None if t2m is None else t2m - t2m.mean()
+
+    def mean_temp_c(self, region, month_idx):
+        t2m = self.series(region, "t2m")
+        return None if t2m is None else float(t2m[month_idx] - 273.15)
+
+    def rain_mm(self, region):
+        """Monthly mean daily precipitation in mm (ERA5 `tp` is m/day)."""
+        tp = self.series(region, "tp")
+        return None if tp is None else tp * 1000.0
+
+
+if __name__ == "__main__":
+    from env_data import load_era5
+
+    print("Building regional climatology from ERA5 monthly means...")
+    ds_ad, ds_ua = load_era5()
+    save_climatology(build_climatology([ds_ad, ds_ua]))
+    ds_ad.close()
+    ds_ua.close()
@@ -0,0 +1,154 @@
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import xarray as xr
+
+from env_sampling import LAT_NAMES, LON_NAMES, TIME_NAMES, find_coord
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.getenv("ECOLENS_DATASET_DIR", os.path.join(os.path.dirname(SCRIPT_DIR), "datasets"))
+
+# ERA5 monthly means: accumulations/fluxes (avgad) and instantaneous (avgua)
+ERA5_FILES = {
+    "ad": "data_stream-moda_stepType-avgad.nc",
+    "ua": "data_stream-moda_stepType-avgua.nc",
+}
+
+# Monthly cubes are small spatially, so chunk along time only
+TIME_CHUNK = 12
+
+
+def era5_path(kind, dataset_dir=None):
+    return os.path.join(dataset_dir or DATASET_DIR, ERA5_FILES[kind])
+
+
+def zarr_path_for(nc_path):
+    return os.path.splitext(nc_path)[0] + ".zarr"
+
+
+def _chunk_spec(ds, time_chunk=TIME_CHUNK):
+    chunks = {dim: -1 for dim in ds.dims}
+    time_name = find_coord(ds, TIME_NAMES)
+    if time_name in chunks:
+        chunks[time_name] = time_chunk
+    return chunks
+
+
+def open_env_dataset(nc_path, prefer_zarr=True, time_chunk=TIME_CHUNK):
+    """Open an ERA5 cube lazily, dask-chunked along time.
+
+    If a Zarr copy made by `convert_to_zarr` exists next to the NetCDF file it
+    is used instead. Falls back to a plain (eager) open when dask is missing.
+    """
+    store = zarr_path_for(nc_path)
+    if prefer_zarr and os.path.isdir(store):
+        try:
+            return xr.open_zarr(store)
+        except ImportError:
+            print("zarr not installed, reading NetCDF instead.")
+
+    try:
+        ds = xr.open_dataset(nc_path, chunks={})
+    except (ImportError, ValueError):
+        print("dask not installed, opening NetCDF eagerly.")
+        return xr.open_dataset(nc_path)
+    return ds.chunk(_chunk_spec(ds, time_chunk))
+
+
+def window(ds, bbox=None, time_range=None):
+    """Lazily select a (lat_min, lat_max, lon_min, lon_max) box and (start, end) period.
+
+    Works with ascending or descending latitude; nothing is read from disk
+    until the values of the result are requested.
+    """
+    selection = {}
+    if bbox is not None:
+        lat_min, lat_max, lon_min, lon_max = bbox
+        lat_name = find_coord(ds, LAT_NAMES)
+        lon_name = find_coord(ds, LON_NAMES)
+        if lat_name:
+            lats = ds[lat_name].values
+            descending = len(lats) > 1 and lats[0] > lats[-1]
+            selection[lat_name] = slice(lat_max, lat_min) if descending else slice(lat_min, lat_max)
+        if lon_name:
+            selection[lon_name] = slice(lon_min, lon_max)
+    if time_range is not None:
+        time_name = find_coord(ds, TIME_NAMES)
+        if time_name:
+            selection[time_name] = slice(*time_range)
+    return ds.sel(**selection) if selection else ds
+
+
+def load_era5(dataset_dir=None, bbox=None, time_range=None):
+    """(ds_ad, ds_ua) lazily opened and windowed."""
+    ds_ad = window(open_env_dataset(era5_path("ad", dataset_dir)), bbox, time_range)
+    ds_ua = window(open_env_dataset(era5_path("ua", dataset_dir)), bbox, time_range)
+    return ds_ad, ds_ua
+
+
+def convert_to_zarr(nc_path, store=None, time_chunk=TIME_CHUNK):
+    """One-off conversion of a NetCDF cube to a chunked Zarr store."""
+    store = store or zarr_path_for(nc_path)
+    ds = open_env_dataset(nc_path, prefer_zarr=False, time_chunk=time_chunk)
+    for var in ds.variables.values():
+        var.encoding.clear()
+    ds.to_zarr(store, mode="w")
+    ds.close()
+    print(f"Wrote {store}")
+    return store
+
+
+def _bench_one(mode, nc_path):
+    """Time a full read of every variable; run in a subprocess for a clean peak RSS."""
+    import resource
+
+    started = time.perf_counter()
+    if mode == "eager":
+        ds = xr.open_dataset(nc_path).load()
+    elif mode == "lazy":
+        ds = open_env_dataset(nc_path, prefer_zarr=False)
+    else:
+        ds = xr.open_zarr(zarr_path_for(nc_path))
+    total = 0.0
+    for var in ds.data_vars:
+        # Reduce per variable, as the samplers/climatology do, instead of
+        # materializing the whole cube at once
+        total += float(np.asarray(ds[var].mean().values))
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode},{elapsed:.4f},{peak_kb}")
+
+
+def benchmark(nc_path, repeats=3):
+    """Compare eager NetCDF, lazy dask NetCDF and Zarr reads (time and peak RSS)."""
+    modes = ["eager", "lazy"]
+    if os.path.isdir(zarr_path_for(nc_path)):
+        modes.append("zarr")
+    print(f"Benchmarking {nc_path}")
+    print(f"{'mode':<8}{'best_s':>10}{'peak_rss_mb':>14}")
+    for mode in modes:
+        runs = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--bench-one", mode, nc_path],
+                                 capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+            _, elapsed, peak_kb = out.split(",")
+            runs.append((float(elapsed), int(peak_kb)))
+        best = min(r[0] for r in runs)
+        peak = max(r[1] for r in runs) / 1024
+        print(f"{mode:<8}{best:>10.4f}{peak:>14.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench-one":
+        _bench_one(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) > 1 and sys.argv[1] == "convert":
+        for kind in ERA5_FILES:
+            convert_to_zarr(era5_path(kind))
+    elif len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        for kind in ERA5_FILES:
+            benchmark(era5_path(kind))
+    else:
+        print("Usage: python env_data.py [convert|benchmark]")
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+LAT_NAMES = ['latitude', 'lat']
+LON_NAMES = ['longitude', 'lon']
+TIME_NAMES = ['valid_time', 'time']
+
+
+def find_coord(ds, candidates):
+    for name in candidates:
+        if name in ds.coords:
+            return name
+    return None
+
+
+def nearest_index(coords, targets):
+    """Index of the nearest coordinate for every target, in one vectorized pass.
+
+    `coords` must be a 1-D monotonic array (ascending or descending, as ERA5
+    latitudes are); out-of-range targets snap to the nearest edge, matching
+    `.sel(..., method='nearest')`.
+    """
+    coords = np.asarray(coords)
+    targets = np.asarray(targets)
+    if len(coords) == 1:
+        return np.zeros(targets.shape, dtype=np.intp)
+
+    descending = coords[0] > coords[-1]
+    ordered = coords[::-1] if descending else coords
+    idx = np.clip(np.searchsorted(ordered, targets), 1, len(ordered) - 1)
+    left = ordered[idx - 1]
+    right = ordered[idx]
+    idx = idx - ((targets - left) < (right - targets))
+    return (len(ordered) - 1 - idx) if descending else idx
+
+
+def to_day_ns(times):
+    """Datetime-like values truncated to day resolution, as int64 nanoseconds."""
+    return pd.to_datetime(np.asarray(times)).normalize().values.astype('datetime64[ns]').astype(np.int64)
+
+
+class GridSampler:
+    """Nearest-neighbour point sampler over a gridded (time, lat, lon) dataset.
+
+    Coordinates are read once, and each variable is materialized once as a
+    NumPy array, so sampling any number of points is a single fancy-indexing
+    gather instead of one `.sel()` per point.
+    """
+
+    def __init__(self, ds):
+        self.ds = ds
+        self.lat_name = find_coord(ds, LAT_NAMES)
+        self.lon_name = find_coord(ds, LON_NAMES)
+        self.time_name = find_coord(ds, TIME_NAMES)
+        self.lats = ds[self.lat_name].values if self.lat_name else None
+        self.lons = ds[self.lon_name].values if self.lon_name else None
+        self.times = ds[self.time_name].values.astype('datetime64[ns]').astype(np.int64) if self.time_name else None
+        self._arrays = {}
+
+    def indices(self, lats, lons, times):
+        """Resolve nearest grid indices for arrays of points."""
+        idx = {}
+        if self.lat_name:
+            idx[self.lat_name] = nearest_index(self.lats, lats)
+        if self.lon_name:
+            idx[self.lon_name] = nearest_index(self.lons, lons)
+        if self.time_name:
+            idx[self.time_name] = nearest_index(self.times, to_day_ns(times))
+        return idx
+
+    def array(self, var_name):
+        if var_name not in self._arrays:
+            da = self.ds[var_name]
+            if 'expver' in da.dims:
+                da = da.isel(expver=0)
+            self._arrays[var_name] = (da.dims, np.asarray(da.values))
+        return self._arrays[var_name]
+
+    def gather(self, var_name, idx):
+        """Values of `var_name` at pre-resolved indices (see `indices`)."""
+        dims, values = self.array(var_name)
+        n = len(next(iter(idx.values())))
+        key = tuple(idx[d] if d in idx else np.zeros(n, dtype=np.intp) for d in dims)
+        return values[key].astype(np.float64)
+
+    def sample(self, var_names, lats, lons, times):
+        """Dict of var_name -> values at every (lat, lon, time) point."""
+        idx = self.indices(lats, lons, times)
+        return {var: self.gather(var, idx) for var in var_names}
+
+
+KM_PER_DEG = 111.32
+
+
+def _scaled_points(lats, lons, day_ns, ref_lat, km_per_day):
+    """(x_km, y_km, t) space where one unit of t equals `km_per_day` days."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    days = np.asarray(day_ns, dtype=np.float64) / 86_400e9
+    return np.column_stack([
+        lons * KM_PER_DEG * np.cos(np.radians(ref_lat)),
+        lats * KM_PER_DEG,
+        days * km_per_day,
+    ])
+
+
+def sample_pseudo_absences(sampler, n, fire_lats, fire_lons, fire_times, var_names=(),
+                           min_distance_km=10.0, min_days=30, seed=42, max_rounds=10):
+    """Draw `n` random (lat, lon, time) grid points away from known fires.
+
+    Candidates are drawn in bulk on the grid's index space. A candidate is
+    rejected when a fire detection lies within `min_distance_km` and
+    `min_days` of it (an ellipsoid in space-time, looked up with a KD-tree)
+    or when any of `var_names` is NaN there. Returns a dict of arrays with
+    keys latitude, longitude, time (datetime64[ns]), possibly fewer than
+    `n` if the grid is saturated with fires.
+    """
+    from scipy.spatial import cKDTree
+
+    rng = np.random.default_rng(seed)
+    ref_lat = float(np.mean(sampler.lats))
+    # Scale time so `min_days` maps onto the same radius as `min_distance_km`
+    km_per_day = min_distance_km / max(min_days, 1e-9)
+    tree = None
+    if len(fire_lats):
+        tree = cKDTree(_scaled_points(fire_lats, fire_lons, to_day_ns(fire_times), ref_lat, km_per_day))
+
+    lat_idx, lon_idx, time_idx = [], [], []
+    accepted = 0
+    for _ in range(max_rounds):
+        m = int((n - accepted) * 1.5) + 16
+        idx = {
+            sampler.lat_name: rng.integers(0, len(sampler.lats), m),
+            sampler.lon_name: rng.integers(0, len(sampler.lons), m),
+            sampler.time_name: rng.integers(0, len(sampler.times), m),
+        }
+        keep = np.ones(m, dtype=bool)
+        if tree is not None:
+            cand = _scaled_points(sampler.lats[idx[sampler.lat_name]], sampler.lons[idx[sampler.lon_name]],
+                                  sampler.times[idx[sampler.time_name]], ref_lat, km_per_day)
+            dist, _ = tree.query(cand, k=1, distance_upper_bound=min_distance_km)
+            keep &= np.isinf(dist)
+        for var in var_names:
+            keep &= ~np.isnan(sampler.gather(var, idx))
+
+        take = np.flatnonzero(keep)[:n - accepted]
+        lat_idx.append(idx[sampler.lat_name][take])
+        lon_idx.append(idx[sampler.lon_name][take])
+        time_idx.append(idx[sampler.time_name][take])
+        accepted += len(take)
+        if accepted >= n:
+            break
+
+    lat_idx = np.concatenate(lat_idx)
+    lon_idx = np.concatenate(lon_idx)
+    time_idx = np.concatenate(time_idx)
+    return {
+        "latitude": sampler.lats[lat_idx],
+        "longitude": sampler.lons[lon_idx],
+        "time": sampler.times[time_idx].astype('datetime64[ns]'),
+    }
@@ -1,10 +1,11 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
-import joblib
 import os
 import glob
 
+from model_bundle import FOREST_BUNDLE_DIR, save_forest_bundle
+
 def train_fire_model():
     print("Loading historical fire data...")
     dataset_path = os.path.join(os.path.dirname(__file__), '..', 'datasets')
@@ -49,9 +50,14 @@ def train_fire_model():
     model = RandomForestRegressor(n_estimators=100, random_state=42)
     model.fit(X, y)
     
-    model_path = os.path.join(os.path.dirname(__file__), 'fire_risk_model.pkl')
-    joblib.dump(model, model_path)
-    print(f"Model saved to {model_path}")
+    # Tree arrays as uncompressed .npy files plus a manifest, instead of a pickle
+    save_forest_bundle(
+        model, FOREST_BUNDLE_DIR,
+        feature_names=list(X.columns),
+        metrics={"train_r2": round(float(model.score(X, y)), 4)},
+        X=X.values, y=y.values,
+        extra={"target": "risk_score"}
+    )
     return model
 
 if __name__ == "__main__":
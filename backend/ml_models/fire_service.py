@@ -1,12 +1,29 @@
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-import joblib
 import os
 import numpy as np
-import json
+import sys
 import requests
 import datetime
-from datetime import timedelta
+import time
+import contextvars
+import gc
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from weather_cache import WeatherCache
+from prediction_cache import PredictionCache
+from model_bundle import INTEGRATED_BUNDLE_DIR, bundle_loader, current_path
+from model_registry import ModelRegistry
+from metrics import BATCH_BUCKETS, CONTENT_TYPE, MetricsRegistry
+from climatology import Climatology, CLIMATOLOGY_PATH
+from fire_forecast import (DEFAULT_RAIN_PROFILE, DEFAULT_TEMP_PROFILE, baseline_features, forecast_entries,
+                           run_forecast, score_tensor)
+from report_snapshot import ReportSnapshots
+from serialization import EncodedBodies, dumps, encode_body
+from risk_grid import EMPTY_TILE, RiskGrid, TileCache, colorize, encode_float16, encode_png, resample_to_tile, tile_overlaps
 
 app = Flask(__name__)
 CORS(app)
@@ -14,12 +31,40 @@ CORS(app)
 # Load the models
 model_dir = os.path.dirname(__file__)
 model_path = os.path.join(model_dir, 'fire_risk_integrated_model.pkl')
+bundle_dir = os.getenv("FIRE_MODEL_BUNDLE", INTEGRATED_BUNDLE_DIR)
 report_path = os.path.join(model_dir, 'fire_analysis_report.json')
 
-if os.path.exists(model_path):
-    model = joblib.load(model_path)
+# Per-region monthly climatology precomputed offline by climatology.py
+# (empty if the artifact hasn't been built; hardcoded profiles are used then)
+climatology = Climatology.load(os.getenv("CLIMATOLOGY_PATH", CLIMATOLOGY_PATH))
+
+# Loaded lazily on first use (or before fork with FIRE_MODEL_PRELOAD=1) and
+# hot-swapped whenever the artifact is replaced on disk. A model bundle is
+# preferred (memory-mapped NumPy trees, else the native booster; the registry
+# watches its CURRENT pointer); the legacy pickle is the fallback, or forced
+# with FIRE_MODEL_FORMAT=pickle.
+fire_model_format = os.getenv("FIRE_MODEL_FORMAT", "trees")
+if fire_model_format != "pickle" and os.path.exists(current_path(bundle_dir)):
+    model_registry = ModelRegistry(current_path(bundle_dir), loader=bundle_loader(fire_model_format),
+                                   check_interval=float(os.getenv("MODEL_CHECK_INTERVAL", 5)))
 else:
-    model = None
+    model_registry = ModelRegistry(model_path, check_interval=float(os.getenv("MODEL_CHECK_INTERVAL", 5)))
+if os.getenv("FIRE_MODEL_PRELOAD", "0") == "1":
+    model_registry.preload()
+
+prediction_cache = PredictionCache(
+    maxsize=int(os.getenv("PREDICTION_CACHE_SIZE", 4096)),
+    ttl=float(os.getenv("PREDICTION_CACHE_TTL", 3600))
+)
+# Larger batches bypass the cache so bulk scoring can't flush the hot entries
+PREDICTION_CACHE_MAX_BATCH = int(os.getenv("PREDICTION_CACHE_MAX_BATCH", 64))
+
+# Gridded risk over the ERA5 extent (datasets dir from ECOLENS_DATASET_DIR) and
+# its encoded rasters/tiles on disk, keyed by model version and data timestamp
+risk_grid = RiskGrid()
+tile_cache = TileCache(os.getenv("RISK_TILE_CACHE_DIR", os.path.join(model_dir, "tile_cache")))
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", 12))
+TILE_MAX_AGE = int(os.getenv("TILE_MAX_AGE", 3600))
 
 # Default report data as fallback
 default_report_data = {
@@ -34,6 +79,25 @@ default_report_data = {
 
 # WAQI API Configuration
 WAQI_API_KEY = os.getenv("WAQI_API_KEY", "0a50601262476b8362ab17999835e5667f05eede")
+WAQI_BASE_URL = os.getenv("WAQI_BASE_URL", "https://api.waqi.info").rstrip("/")
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", 10))
+WEATHER_WORKERS = int(os.getenv("WEATHER_WORKERS", 8))
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", 10000))
+# Report forecast horizon (months); /report/fire?months=N up to the max
+FORECAST_MONTHS = int(os.getenv("FORECAST_MONTHS", 12))
+FORECAST_MAX_MONTHS = int(os.getenv("FORECAST_MAX_MONTHS", 36))
+
+# One pooled session shared by all weather fetches (keep-alive to WAQI)
+http_session = requests.Session()
+http_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=WEATHER_WORKERS))
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=WEATHER_WORKERS))
+http_session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'})
+
+weather_executor = ThreadPoolExecutor(max_workers=WEATHER_WORKERS, thread_name_prefix="weather")
+weather_cache = WeatherCache(
+    ttl=float(os.getenv("WEATHER_CACHE_TTL", 600)),
+    stale_ttl=float(os.getenv("WEATHER_CACHE_STALE_TTL", 1800))
+)
 
 REGIONS = [
     {"name": "Sundarbans", "lat": 21.94, "lon": 89.18, "temp_adj": 0, "rain_adj": 0, "density": 5.23},
@@ -41,18 +105,118 @@ REGIONS = [
     {"name": "Central India", "lat": 23.50, "lon": 78.50, "temp_adj": 4, "rain_adj": -1, "density": 100.0}
 ]
 
+# Per-process metrics served in Prometheus text format on /metrics
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    "fire_request_seconds", "Request latency by endpoint, method and status.", ["endpoint", "method", "status"])
+stage_seconds = metrics.histogram(
+    "fire_stage_seconds", "Time spent in each stage of a request (endpoint=background for snapshot refreshes).",
+    ["endpoint", "stage"])
+upstream_seconds = metrics.histogram("fire_upstream_seconds", "Latency of upstream API calls.", ["upstream"])
+upstream_errors = metrics.counter(
+    "fire_upstream_errors_total", "Failed upstream calls by kind (timeout, connection, invalid_response, api_status, error).",
+    ["upstream", "kind"])
+model_seconds = metrics.histogram("fire_model_call_seconds", "Latency of a single model call.", ["endpoint"])
+model_batch_rows = metrics.histogram("fire_model_batch_rows", "Rows scored per model call.", buckets=BATCH_BUCKETS)
+model_errors = metrics.counter("fire_model_errors_total", "Model calls that raised and fell back to the default score.")
+metrics.gauge("fire_model_loaded", "1 if a fire model is loaded.", lambda: model_registry.info()["loaded"])
+metrics.counter_from("fire_model_reloads_total", "Hot reloads of the model artifact.", lambda: model_registry.reloads)
+metrics.counter_from("fire_prediction_cache_hits_total", "Prediction cache hits.", lambda: prediction_cache.hits)
+metrics.counter_from("fire_prediction_cache_misses_total", "Prediction cache misses.", lambda: prediction_cache.misses)
+metrics.counter_from("fire_weather_cache_hits_total", "Weather cache hits, fresh or stale.",
+                     lambda: weather_cache.hits + weather_cache.stale_hits)
+metrics.counter_from("fire_weather_cache_misses_total", "Weather cache misses.", lambda: weather_cache.misses)
+metrics.counter_from("fire_report_snapshot_builds_total", "Report snapshot builds.", lambda: report_snapshots.builds)
+
+# (endpoint, method, start time) of the request being served; read on every
+# recorded event, so kept in a ContextVar rather than behind flask's proxies
+current_request = contextvars.ContextVar("current_request", default=None)
+
+def request_endpoint():
+    current = current_request.get()
+    return current[0] if current is not None else "background"
+
+def stage(name):
+    """`with stage("scoring"):` times one stage of the current request (or background work)."""
+    return stage_seconds.labels(request_endpoint(), name).time()
+
+@app.before_request
+def start_request_timer():
+    req = request._get_current_object()  # one proxy lookup instead of two
+    current_request.set((req.endpoint or "unmatched", req.method, time.perf_counter()))
+
+@app.after_request
+def record_request(response):
+    current = current_request.get()
+    if current is not None:
+        endpoint, method, started = current
+        request_seconds.labels(endpoint, method, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+@app.teardown_request
+def clear_request(exc):
+    current_request.set(None)
+
+# Everything recorded for one /predict/fire/batch request (the request hooks,
+# parse/scoring/serialize/compress stages, model call timer and batch size)
+# may add at most this share of the request's own time in the test client
+MAX_METRICS_OVERHEAD = float(os.getenv("MAX_METRICS_OVERHEAD", 0.10))
+REQUEST_HOOKS = [(app.before_request_funcs, start_request_timer), (app.after_request_funcs, record_request),
+                 (app.teardown_request_funcs, clear_request)]
+
+def metrics_overhead(pairs=3000):
+    """(extra seconds per /predict/fire/batch request spent on metrics, seconds without them).
+
+    Sends the same request through the Flask test client alternately with
+    the hooks and metrics live and with both switched off, and compares the
+    medians, which keeps scheduler and GC noise out of a ~20 us difference.
+    """
+    client = app.test_client()
+    body = {"rows": [{"tp": 0.001 * i, "u10": 3.0} for i in range(8)]}
+
+    def timed():
+        started = time.perf_counter()
+        client.post('/predict/fire/batch', json=body)
+        return time.perf_counter() - started
+
+    for _ in range(200):
+        timed()
+    live, baseline = [], []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(pairs):
+            live.append(timed())
+            positions = [funcs[None].index(hook) for funcs, hook in REQUEST_HOOKS]
+            for funcs, hook in REQUEST_HOOKS:
+                funcs[None].remove(hook)
+            try:
+                with metrics.disabled():
+                    baseline.append(timed())
+            finally:
+                for (funcs, hook), i in zip(REQUEST_HOOKS, positions):
+                    funcs[None].insert(i, hook)
+    finally:
+        gc.enable()
+    return statistics.median(live) - statistics.median(baseline), statistics.median(baseline)
+
+# Compressed variants of immutable bodies (report snapshots), keyed by ETag
+encoded_bodies = EncodedBodies(maxsize=int(os.getenv("ENCODED_BODY_CACHE_SIZE", 32)))
+
+def encoded_response(body, mimetype='application/json', cache_key=None):
+    """Response for pre-encoded bytes, gzip/brotli-compressed per Accept-Encoding."""
+    with stage("compress"):
+        payload, encoding = encode_body(body, request.accept_encodings, encoded_bodies, cache_key)
+    response = Response(payload, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response, encoding
+
 def json_response(data):
-    def default(obj):
-        if isinstance(obj, (np.float32, np.float64, np.floating)):
-            return float(obj)
-        if isinstance(obj, (np.int32, np.int64, np.integer)):
-            return int(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return str(obj)
-        
-    json_data = json.dumps(data, default=default)
-    return Response(json_data, mimetype='application/json')
+    with stage("serialize"):
+        body = dumps(data)
+    return encoded_response(body)[0]
 
 def fetch_weather_data(lat, lon):
     """Fetch current weather data from WAQI API with robust extraction."""
@@ -61,11 +225,11 @@ def fetch_weather_data(lat, lon):
         return None
     
     try:
-        url = f"https://api.waqi.info/feed/geo:{lat};{lon}/?token={WAQI_API_KEY}"
-        # Add User-Agent to avoid potential blocking
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, timeout=10, headers=headers)
-        data = response.json()
+        url = f"{WAQI_BASE_URL}/feed/geo:{lat};{lon}/?token={WAQI_API_KEY}"
+        # Session carries a browser User-Agent to avoid potential blocking
+        with upstream_seconds.labels("waqi").time():
+            response = http_session.get(url, timeout=WEATHER_TIMEOUT)
+            data = response.json()
         
         if data.get('status') == 'ok':
             iaqi = data.get('data', {}).get('iaqi', {})
@@ -84,95 +248,133 @@ def fetch_weather_data(lat, lon):
                  pass
             
             return weather
+        upstream_errors.labels("waqi", "api_status").inc()
+        print(f"WAQI returned status {data.get('status')!r}")
+    except requests.Timeout as e:
+        upstream_errors.labels("waqi", "timeout").inc()
+        print(f"Timeout fetching weather: {e}")
+    except ValueError as e:
+        # Non-JSON body (requests' JSONDecodeError is also a RequestException)
+        upstream_errors.labels("waqi", "invalid_response").inc()
+        print(f"Invalid weather response: {e}")
+    except requests.RequestException as e:
+        upstream_errors.labels("waqi", "connection").inc()
+        print(f"Error fetching weather: {e}")
     except Exception as e:
+        upstream_errors.labels("waqi", "error").inc()
         print(f"Error fetching weather: {e}")
     
     return None
 
-def predict_risk_score(features):
-    """Predict risk score using the loaded model."""
-    if not model:
-        return 50.0 # Default if model missing
+def get_weather(lat, lon):
+    """Cached weather lookup; stale entries are served while refreshing in the background."""
+    return weather_cache.get(lat, lon, lambda: fetch_weather_data(lat, lon), executor=weather_executor)
+
+def fetch_weather_batch(regions):
+    """Fetch weather for all regions concurrently, preserving the input order."""
+    futures = [weather_executor.submit(get_weather, r['lat'], r['lon']) for r in regions]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            upstream_errors.labels("waqi", "error").inc()
+            print(f"Error fetching weather: {e}")
+            results.append(None)
+    return results
+
+def score_with_model(active_model, features):
+    """Score a (n_rows, 3) feature matrix with a single model call; returns 0-100 risk scores."""
+    if not active_model:
+        return np.full(len(features), 50.0) # Default if model missing
         
+    model_batch_rows.observe(len(features))
     try:
-        if hasattr(model, 'predict_proba'):
-            prob = model.predict_proba(features)[0][1]
-            return round(float(prob) * 100, 1)
-        else:
-            prediction = model.predict(features)[0]
-            return 100.0 if prediction == 1 else 10.0
-    except:
-        return 50.0
-
-def generate_12_month_forecast(base_weather):
-    """Generate 12-month forecast based on base weather and regional seasonality."""
-    current_date = datetime.datetime.now()
-    base_temp = base_weather.get('temp', 31.5)
-    base_wind = base_weather.get('wind_speed', 3.5)
-    
-    # Seasonality for Sundarbans: High Risk in Mar-May (Dry/Heat)
-    seasonal_risk_modifiers = {
-        "January": -10, "February": -5, "March": 15, "April": 25, "May": 20,
-        "June": -30, "July": -40, "August": -40, "September": -30,
-        "October": -10, "November": -15, "December": -12
-    }
-    
-    # Simple seasonal profiles for temp and rain
-    temp_profile = [-5, -3, 2, 5, 6, 4, 0, -1, -2, -3, -4, -5] 
-    rain_profile = [0.1, 0.1, 0.2, 1, 3, 10, 15, 12, 8, 2, 0.5, 0.2]
-    
-    start_month_idx = current_date.month - 1
-    
-    forecast = []
-    for i in range(12):
-        month_idx = (start_month_idx + i) % 12
-        target_date = current_date + timedelta(days=30*i)
-        month_name = target_date.strftime("%B")
-        
-        # Base risk from current wind conditions
-        features = np.array([[0.001, 0.0, float(base_wind)]])
-        base_risk = predict_risk_score(features)
-        
-        # Apply seasonal modifier
-        seasonal_risk = base_risk + seasonal_risk_modifiers.get(month_name, 0)
-        risk = max(5, min(95, seasonal_risk))
-        
-        # Simulate temp/rain for front-end charts
-        simulated_temp = base_temp + temp_profile[month_idx]
-        simulated_rain = rain_profile[month_idx]
-        
-        status = "STABLE"
-        if risk > 75: status = "CRITICAL"
-        elif risk > 50: status = "CAUTION"
-        elif risk > 25: status = "MODERATE"
+        with model_seconds.labels(request_endpoint()).time():
+            if hasattr(active_model, 'predict_proba'):
+                probs = active_model.predict_proba(features)[:, 1]
+                return np.round(probs.astype(np.float64) * 100, 1)
+            else:
+                predictions = active_model.predict(features)
+                return np.where(predictions == 1, 100.0, 10.0)
+    except Exception as e:
+        model_errors.inc()
+        print(f"Error scoring with model: {e}")
+        return np.full(len(features), 50.0)
+
+def predict_risk_scores(features):
+    """Score feature rows, serving repeated rows from the prediction cache."""
+    features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+    active = model_registry.get()
+    active_model, fingerprint = active.model, active.version
+    prediction_cache.sync(fingerprint)
+    if not active_model or len(features) > PREDICTION_CACHE_MAX_BATCH:
+        return score_with_model(active_model, features)
         
-        forecast.append({
-            "month": month_name,
-            "year": target_date.year,
-            "risk_score": round(risk, 1),
-            "status": status,
-            "insight": f"Seasonal transition: {status} risk expected for {month_name}.",
-            "weather": {
-                "temp": round(simulated_temp, 1),
-                "rain": round(simulated_rain, 1)
-            }
-        })
+    keys = prediction_cache.row_keys(features)
+    cached = prediction_cache.get_many(keys)
+    missing = [i for i, value in enumerate(cached) if value is None]
+    if not missing:
+        return np.array(cached)
         
-    return forecast
+    scores = score_with_model(active_model, features[missing])
+    prediction_cache.put_many(((keys[i], float(v)) for i, v in zip(missing, scores)), fingerprint)
+    for i, v in zip(missing, scores):
+        cached[i] = float(v)
+    return np.array(cached)
+
+def predict_risk_score(features):
+    """Predict risk score for a single feature row using the loaded model."""
+    return float(predict_risk_scores(features)[0])
+
+def risk_features(precipitation, wind_speed):
+    """Model input row: [tp, placeholder, u10]."""
+    return [float(precipitation), 0.0, float(wind_speed)]
+
+def region_profiles(region_names, current_date):
+    """(regions, 12) monthly temperature offsets and rain for the forecast engine, and each region's source.
+
+    Regional climatology when available, otherwise simple Sundarbans-shaped
+    defaults (regions outside the ERA5 cube, or no climatology artifact).
+    Climatological offsets are taken relative to the current month, since
+    the base temperature is "now".
+    """
+    temp_profiles = np.tile(DEFAULT_TEMP_PROFILE, (len(region_names), 1))
+    rain_profiles = np.tile(DEFAULT_RAIN_PROFILE, (len(region_names), 1))
+    sources = []
+    for i, name in enumerate(region_names):
+        offsets = climatology.temp_offsets(name)
+        if offsets is not None:
+            temp_profiles[i] = offsets - offsets[current_date.month - 1]
+        rain = climatology.rain_mm(name)
+        if rain is not None:
+            rain_profiles[i] = rain
+        sources.append("climatology" if offsets is not None and rain is not None else "default")
+    return temp_profiles, rain_profiles, sources
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for Render."""
     return json_response({
         "status": "healthy",
-        "model_loaded": model is not None,
+        "model_loaded": model_registry.get().model is not None,
+        "model": model_registry.info(),
+        "weather_cache": weather_cache.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "climatology_loaded": bool(climatology),
+        "report_snapshot": report_snapshots.stats(),
         "timestamp": datetime.datetime.now().isoformat()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint (this worker's metrics)."""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
 @app.route('/predict/fire', methods=['POST'])
 def predict_fire():
     """Ad-hoc prediction endpoint."""
-    if not model:
+    if not model_registry.get().model:
         return json_response({"error": "Model not trained yet"}), 500
         
     data = request.json
@@ -182,8 +384,9 @@ def predict_fire():
         u10 = data.get('u10', data.get('wind_speed', 5.0))
         temp = data.get('temp', 30.0)
         
-        features = np.array([[float(tp), 0.0, float(u10)]])
-        risk_score = predict_risk_score(features)
+        features = np.array([risk_features(tp, u10)])
+        with stage("scoring"):
+            risk_score = predict_risk_score(features)
         
         status = "LOW"
         if risk_score > 75: status = "CRITICAL"
@@ -216,33 +419,78 @@ def predict_fire():
         traceback.print_exc()
         return json_response({"error": str(e)}), 400
 
-@app.route('/report/fire', methods=['GET'])
-def get_report():
-    """Dynamically generate regional analysis report."""
+@app.route('/predict/fire/batch', methods=['POST'])
+def predict_fire_batch():
+    """Score many condition rows in one round trip.
+
+    Accepts {"rows": [{"tp": .., "u10": ..}, ...]} (or a bare list of rows);
+    `rainfall`/`wind_speed` are accepted as aliases like /predict/fire.
+    """
+    if not model_registry.get().model:
+        return json_response({"error": "Model not trained yet"}), 500
+        
+    data = request.get_json(silent=True)
+    rows = data.get('rows') if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not rows:
+        return json_response({"error": "Expected a non-empty 'rows' list"}), 400
+    if len(rows) > MAX_BATCH_ROWS:
+        return json_response({"error": f"Batch too large: {len(rows)} rows (max {MAX_BATCH_ROWS})"}), 413
+        
+    try:
+        with stage("parse"):
+            features = np.array([
+                risk_features(row.get('tp', row.get('rainfall', 0.001)), row.get('u10', row.get('wind_speed', 5.0)))
+                for row in rows
+            ])
+    except (AttributeError, TypeError, ValueError) as e:
+        return json_response({"error": f"Invalid row: {e}"}), 400
+        
+    with stage("scoring"):
+        scores = predict_risk_scores(features)
+    statuses = np.select([scores > 75, scores > 50, scores > 25], ["CRITICAL", "CAUTION", "STABLE"], default="LOW")
     
+    return json_response({
+        "count": len(scores),
+        "risk_scores": scores,
+        "statuses": statuses
+    })
+
+def build_report(months):
+    """Dynamically generate the regional analysis report with a `months`-long forecast."""
     regional_results = []
     
-    for region in REGIONS:
-        # 1. Fetch live weather (or mock)
-        weather = fetch_weather_data(region['lat'], region['lon'])
-        
+    # 1. Fetch live weather for every region at once (cached, or mock below)
+    with stage("weather"):
+        region_weather = fetch_weather_batch(REGIONS)
+    
+    for i, (region, weather) in enumerate(zip(REGIONS, region_weather)):
         if not weather:
             # Fallback mock weather if API fails
             val = float(np.random.uniform(0, 1))
-            weather = {
-                'temp': 30.0 + region['temp_adj'],
+            clim_temp = climatology.mean_temp_c(region['name'], datetime.datetime.now().month - 1)
+            region_weather[i] = {
+                'temp': round(clim_temp, 1) if clim_temp is not None else 30.0 + region['temp_adj'],
                 'humidity': 60.0,
                 'wind_speed': 2.0,
                 'precipitation': 0.001 if val > 0.3 else 5.0, # Random rain
                 'data_source': 'ESTIMATED_FALLBACK'
             }
-            
-        # 2. Predict Base Fire Risk
-        features = np.array([[float(weather['precipitation']), 0.0, float(weather['wind_speed'])]])
-        current_risk = predict_risk_score(features)
-        
-        # 3. Generate 12-Month Forecast
-        forecast_12m = generate_12_month_forecast(weather)
+    
+    # 2. Score every row the report needs in one model call: each region's
+    #    current conditions plus its (regions x months) forecast baseline tensor
+    now = datetime.datetime.now()
+    features = baseline_features([w.get('wind_speed', 3.5) for w in region_weather], months)
+    current = [risk_features(w['precipitation'], w['wind_speed']) for w in region_weather]
+    with stage("scoring"):
+        base_risk, current_scores = score_tensor(predict_risk_scores, features, extra_rows=current)
+    
+    # 3. Seasonal forecast for every region at once; dicts are only built per region below
+    with stage("forecast"):
+        temp_profiles, rain_profiles, profile_sources = region_profiles([r['name'] for r in REGIONS], now)
+        forecast = run_forecast(base_risk, [w.get('temp', 31.5) for w in region_weather], temp_profiles, rain_profiles, start=now)
+    
+    for i, (region, weather) in enumerate(zip(REGIONS, region_weather)):
+        current_risk = float(current_scores[i])
         
         # 4. Determine status
         status = "STABLE"
@@ -256,20 +504,146 @@ def get_report():
             "current_weather": weather,
             "current_risk_index": current_risk,
             "status": status,
-            "monthly_forecast": forecast_12m,
+            "monthly_forecast": forecast_entries(forecast, i),
+            "forecast_profile": profile_sources[i],
             "historical_fire_density": region.get('density', 5.0) 
         })
         
-    report = {
+    return {
         "model_details": default_report_data["model_details"],
         "generated_at": datetime.datetime.now().isoformat(),
         "regional_analysis": regional_results
     }
+
+def serialize_report(report):
+    with stage("serialize"):
+        return dumps(report)
+
+# Reports are served from snapshots keyed by horizon; the default one is kept
+# warm by a background refresh every REPORT_REFRESH_INTERVAL seconds
+report_snapshots = ReportSnapshots(
+    build_report,
+    serialize_report,
+    interval=float(os.getenv("REPORT_REFRESH_INTERVAL", 300)),
+    warm_keys=[FORECAST_MONTHS],
+    version_fn=lambda: model_registry.get().version
+)
+
+@app.route('/report/fire', methods=['GET'])
+def get_report():
+    """Regional analysis report (?months=N sets the forecast horizon).
+
+    Served from a precomputed snapshot with ETag/Last-Modified; conditional
+    requests that still match get 304 Not Modified.
+    """
+    months = request.args.get('months', FORECAST_MONTHS, type=int)
+    if not 1 <= months <= FORECAST_MAX_MONTHS:
+        return json_response({"error": f"months must be between 1 and {FORECAST_MAX_MONTHS}"}), 400
     
-    return json_response(report)
+    # Cheap on a fresh snapshot; includes the whole rebuild when one is stale
+    with stage("snapshot"):
+        snapshot = report_snapshots.get(months)
+    response, encoding = encoded_response(snapshot.body, cache_key=snapshot.etag)
+    # Each content coding is its own representation, so it gets its own ETag
+    response.set_etag(f"{snapshot.etag}-{encoding}" if encoding else snapshot.etag)
+    response.last_modified = datetime.datetime.fromtimestamp(snapshot.built_at, datetime.timezone.utc)
+    # Clients may keep the body but must revalidate (cheap 304) before reuse
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def grid_response(data, mimetype, version, headers=None, cache_key=None):
+    """Grid/tile response; with `cache_key` the body is compressed per Accept-Encoding."""
+    if cache_key is None:
+        response = Response(data, mimetype=mimetype)
+    else:
+        response = encoded_response(data, mimetype, cache_key)[0]
+    response.headers['Cache-Control'] = f"public, max-age={TILE_MAX_AGE}"
+    response.headers['X-Model-Version'] = version[0]
+    response.headers['X-Data-Version'] = version[1]
+    response.headers.update(headers or {})
+    return response
+
+def grid_raster(when):
+    """(model_version, data_version) and the risk raster for `when` (latest time step if None)."""
+    active = model_registry.get()
+    if not active.model:
+        raise LookupError("Model not trained yet")
+    version = (active.version, risk_grid.data_version() or "none")
+    risk, lats, lons, label = risk_grid.raster(lambda rows: score_with_model(active.model, rows), active.version, when)
+    return version, risk, lats, lons, label
+
+@app.route('/risk/grid', methods=['GET'])
+def risk_grid_raster():
+    """Risk for every ERA5 grid cell as one raster.
+
+    ?format=png (colour-ramped RGBA, default) or f16 (little-endian float16,
+    NaN = no data, gzip/brotli per Accept-Encoding); ?time=YYYY-MM picks the
+    nearest time step.
+    Grid shape and bounds are returned in X-Grid-* headers.
+    """
+    fmt = request.args.get('format', 'png')
+    when = request.args.get('time')
+    if fmt not in ('png', 'f16'):
+        return json_response({"error": "format must be 'png' or 'f16'"}), 400
+    try:
+        version, risk, lats, lons, label = grid_raster(when)
+    except FileNotFoundError as e:
+        return json_response({"error": str(e)}), 503
+    except LookupError as e:
+        return json_response({"error": str(e)}), 500
+    except ValueError as e:
+        return json_response({"error": f"Invalid time: {e}"}), 400
+
+    headers = {
+        'X-Grid-Shape': f"{risk.shape[0]},{risk.shape[1]}",
+        'X-Grid-Bounds': f"{lats.min()},{lats.max()},{lons.min()},{lons.max()}",
+        'X-Grid-Lat-Order': "descending" if len(lats) > 1 and lats[0] > lats[-1] else "ascending",
+        'X-Grid-Time': label or "",
+    }
+    # Raw float16 is stored as .f16le; compression is negotiated per request
+    key = f"grid_{label}.{'png' if fmt == 'png' else 'f16le'}"
+    data = tile_cache.get(version, key)
+    if data is None:
+        data = encode_png(colorize(risk)) if fmt == 'png' else encode_float16(risk)
+        tile_cache.put(version, key, data)
+    if fmt == 'f16':
+        return grid_response(data, 'application/octet-stream', version, headers, cache_key=(version, key))
+    return grid_response(data, 'image/png', version, headers)
+
+@app.route('/risk/tiles/<int:z>/<int:x>/<int:y>.png', methods=['GET'])
+def risk_tile(z, x, y):
+    """XYZ (Web Mercator) PNG tile of the risk grid; ?time=YYYY-MM as for /risk/grid."""
+    if not 0 <= z <= TILE_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return json_response({"error": "Tile out of range"}), 404
+    when = request.args.get('time')
+    try:
+        version, risk, lats, lons, label = grid_raster(when)
+    except FileNotFoundError as e:
+        return json_response({"error": str(e)}), 503
+    except LookupError as e:
+        return json_response({"error": str(e)}), 500
+    except ValueError as e:
+        return json_response({"error": f"Invalid time: {e}"}), 400
+
+    if not tile_overlaps(lats, lons, z, x, y):
+        # Nothing to draw; a shared constant keeps crawlers from filling the tile cache
+        return grid_response(EMPTY_TILE, 'image/png', version, {'X-Grid-Time': label or ""})
+
+    key = os.path.join(f"tiles_{label}", str(z), str(x), f"{y}.png")
+    data = tile_cache.get(version, key)
+    if data is None:
+        data = encode_png(colorize(resample_to_tile(risk, lats, lons, z, x, y)))
+        tile_cache.put(version, key, data)
+    return grid_response(data, 'image/png', version, {'X-Grid-Time': label or ""})
 
 if __name__ == "__main__":
+    if "--check-metrics" in sys.argv:
+        # Run on every deploy build (render.yaml); fails the build if recording gets expensive
+        overhead, request_time = metrics_overhead()
+        print(f"Metrics overhead {overhead * 1e6:.1f} us per /predict/fire/batch request, "
+              f"{overhead / request_time:.1%} of {request_time * 1e6:.0f} us (bound {MAX_METRICS_OVERHEAD:.0%})")
+        sys.exit(0 if overhead < MAX_METRICS_OVERHEAD * request_time else 1)
     port = int(os.getenv("PORT", 5000))
     print(f"Starting Flask server on http://0.0.0.0:{port}")
-    print("Available endpoints: /health (GET), /predict/fire (POST), /report/fire (GET)")
+    print("Available endpoints: /health (GET), /metrics (GET), /predict/fire (POST), /predict/fire/batch (POST), /report/fire (GET), /risk/grid (GET), /risk/tiles/<z>/<x>/<y>.png (GET)")
     app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
@@ -0,0 +1,109 @@
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Sundarbans extent of the ERA5 NetCDF files: (lat_min, lat_max, lon_min, lon_max)
+SUNDARBANS_BBOX = (21.5, 22.5, 88.0, 89.0)
+
+# Explicit dtypes for the FIRMS columns we may read; everything else is skipped
+FIRMS_DTYPES = {
+    "latitude": "float64",
+    "longitude": "float64",
+    "brightness": "float32",
+    "bright_t31": "float32",
+    "frp": "float32",
+    "confidence": "str",
+    "satellite": "category",
+    "instrument": "category",
+    "daynight": "category",
+}
+
+
+def _filter_signature(dataset_dir, bbox, start, end, columns):
+    """Hash of the query: which archive, filter and columns."""
+    key = json.dumps([os.path.abspath(dataset_dir), list(bbox), str(start), str(end), list(columns)])
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+def _source_signature(files):
+    """Hash of the source files' paths, sizes and modification times."""
+    parts = [[os.path.abspath(f), os.path.getsize(f), os.stat(f).st_mtime_ns] for f in sorted(files)]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:16]
+
+
+def _read_filtered(path, bbox, start, end, columns, chunksize):
+    header = pd.read_csv(path, nrows=0).columns
+    name_map = {c: c.lower() for c in header if c.lower() in columns}
+    dtypes = {c: FIRMS_DTYPES[lc] for c, lc in name_map.items() if lc in FIRMS_DTYPES}
+    lat_min, lat_max, lon_min, lon_max = bbox
+
+    kept = []
+    for chunk in pd.read_csv(path, usecols=list(name_map), dtype=dtypes, chunksize=chunksize):
+        chunk = chunk.rename(columns=name_map)
+        mask = ((chunk['latitude'] >= lat_min) & (chunk['latitude'] <= lat_max) &
+                (chunk['longitude'] >= lon_min) & (chunk['longitude'] <= lon_max))
+        chunk = chunk[mask]
+        if chunk.empty:
+            continue
+        chunk['acq_date'] = pd.to_datetime(chunk['acq_date']).dt.tz_localize(None) # Match NC naive time
+        if start is not None:
+            chunk = chunk[chunk['acq_date'] >= pd.Timestamp(start)]
+        if end is not None:
+            chunk = chunk[chunk['acq_date'] <= pd.Timestamp(end)]
+        kept.append(chunk)
+    return kept
+
+
+def load_fire_archive(dataset_dir, bbox=SUNDARBANS_BBOX, start=None, end=None,
+                      columns=("latitude", "longitude", "acq_date"), chunksize=250_000,
+                      cache_dir=None):
+    """Stream every fire_archive_*.csv, keeping only rows inside `bbox` and [start, end].
+
+    Files are read in chunks with only the requested columns, so peak memory
+    is bounded by one chunk plus the (small) filtered result. When `cache_dir`
+    is given the filtered frame is stored as Parquet and reused until any
+    source file, the filter or the column list changes; writing a new cache
+    removes the one it supersedes.
+    """
+    columns = tuple(c.lower() for c in columns)
+    if "acq_date" not in columns:
+        columns = columns + ("acq_date",)
+    files = glob.glob(os.path.join(dataset_dir, "fire_archive_*.csv"))
+    if not files:
+        return pd.DataFrame(columns=list(columns))
+
+    cache_path = None
+    if cache_dir:
+        cache_prefix = os.path.join(cache_dir, f"fire_archive_filtered_{_filter_signature(dataset_dir, bbox, start, end, columns)}_")
+        cache_path = f"{cache_prefix}{_source_signature(files)}.parquet"
+        if os.path.exists(cache_path):
+            try:
+                fire_df = pd.read_parquet(cache_path)
+                print(f"Loaded {len(fire_df)} filtered fire records from cache {cache_path}")
+                return fire_df
+            except ImportError:
+                print("Parquet support not installed (pyarrow), reading CSVs directly.")
+                cache_path = None
+
+    kept = []
+    for f in sorted(files):
+        kept.extend(_read_filtered(f, bbox, start, end, columns, chunksize))
+    if kept:
+        fire_df = pd.concat(kept, ignore_index=True)
+    else:
+        fire_df = pd.DataFrame(columns=list(columns))
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fire_df.to_parquet(cache_path, index=False)
+            # Same query over older versions of the source files
+            for stale in glob.glob(f"{glob.escape(cache_prefix)}*.parquet"):
+                if stale != cache_path:
+                    os.remove(stale)
+        except ImportError:
+            print("Parquet support not installed (pyarrow), skipping fire archive cache.")
+    return fire_df
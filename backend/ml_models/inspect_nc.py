@@ -1,5 +1,5 @@
-import xarray as xr
 import os
+from env_data import open_env_dataset, era5_path
 
 def inspect_nc(file_path):
     print(f"\n{'='*20}\nInspecting: {file_path}")
@@ -8,12 +8,15 @@ def inspect_nc(file_path):
         return
     
     try:
-        ds = xr.open_dataset(file_path)
+        # Lazy open: only coordinates are read, data stays on disk
+        ds = open_env_dataset(file_path)
         print("\nVARIABLES:")
         for var in ds.data_vars:
             print(f" - {var}: {ds[var].attrs.get('long_name', 'No long name')}")
             print(f"   Units: {ds[var].attrs.get('units', 'No units')}")
             print(f"   Shape: {ds[var].shape}")
+            if ds[var].chunks:
+                print(f"   Chunks: {tuple(c[0] for c in ds[var].chunks)}")
         
         print("\nCOORDINATES:")
         for coord in ds.coords:
@@ -26,6 +29,5 @@ def inspect_nc(file_path):
     except Exception as e:
         print(f"Error: {e}")
 
-dataset_dir = r"d:\Hackathons\next\backend\datasets"
-inspect_nc(os.path.join(dataset_dir, "data_stream-moda_stepType-avgad.nc"))
-inspect_nc(os.path.join(dataset_dir, "data_stream-moda_stepType-avgua.nc"))
+inspect_nc(era5_path("ad"))
+inspect_nc(era5_path("ua"))
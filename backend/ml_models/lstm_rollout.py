@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+
+
+def rollout(model, windows, exog, target_col=2):
+    """Batched autoregressive forecast for many series at once.
+
+    windows: (batch, seq_length, n_features) scaled history for every series
+             (species, Monte-Carlo draw or scenario variant).
+    exog:    (batch, horizon, n_features) scaled exogenous features for each
+             future step; the target column is ignored and filled with the
+             model's own predictions.
+
+    All series advance together with one direct `model(x, training=False)`
+    call per step (no `predict()` overhead). The history lives in a
+    preallocated (batch, seq_length + horizon, n_features) buffer and each
+    step's input is a view into it, so nothing is appended or copied.
+
+    Returns (predictions (batch, horizon), step_seconds (horizon,)).
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    batch, seq_length, n_features = windows.shape
+    horizon = exog.shape[1]
+
+    buffer = np.empty((batch, seq_length + horizon, n_features), dtype=np.float32)
+    buffer[:, :seq_length] = windows
+    buffer[:, seq_length:] = exog
+    predictions = np.empty((batch, horizon), dtype=np.float32)
+    step_seconds = np.empty(horizon)
+
+    for t in range(horizon):
+        started = time.perf_counter()
+        out = np.asarray(model(buffer[:, t:t + seq_length], training=False)).reshape(batch, -1)
+        predictions[:, t] = out[:, 0]
+        buffer[:, seq_length + t, target_col] = out[:, 0]
+        step_seconds[t] = time.perf_counter() - started
+
+    return predictions, step_seconds
+
+
+def trend_exog(trends, start, horizon, scaler, n_features=3, target_col=2, noise=None):
+    """Scaled exogenous rows from linear trends, clipped to [0, 1] before scaling.
+
+    trends: list of (slope, intercept) per exogenous column, in column order
+    (the target column is skipped). Evaluated at t = start + 1 .. start + horizon.
+    `noise` (batch, horizon, n_exog) adds Monte-Carlo perturbations; returns
+    (batch, horizon, n_features) with batch = 1 when no noise is given.
+    """
+    steps = np.arange(start + 1, start + horizon + 1, dtype=np.float64)
+    exog_cols = [c for c in range(n_features) if c != target_col]
+    raw = np.stack([slope * steps + intercept for slope, intercept in trends], axis=-1)[None]
+    if noise is not None:
+        raw = raw + noise
+    raw = np.clip(raw, 0, 1)
+
+    batch = raw.shape[0]
+    placeholder = np.zeros((batch * horizon, n_features))
+    placeholder[:, exog_cols] = raw.reshape(-1, len(exog_cols))
+    scaled = scaler.transform(placeholder).reshape(batch, horizon, n_features)
+    scaled[..., target_col] = 0.0
+    return scaled.astype(np.float32)
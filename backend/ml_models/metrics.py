@@ -0,0 +1,302 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; spans cache hits (~0.1 ms) to slow upstream calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Rows per model call
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative only when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    """`with histogram.labels(...).time():` observes the block's wall time in seconds."""
+    __slots__ = ("child", "started")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NullChild:
+    """Stands in for every child while a registry is disabled."""
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def time(self):
+        return _NULL_TIMER
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_CHILD, _NULL_TIMER = _NullChild(), _NullTimer()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Child for one label combination; cheap enough to call per event."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_labels(self.labelnames, values)} {_fmt(child.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = 'le="' + _fmt(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Value read from `fn()` at scrape time, e.g. counts an existing stats() already keeps."""
+
+    def __init__(self, name, help, fn, kind="gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.kind = kind
+
+    def render(self):
+        try:
+            value = float(self.fn())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {_fmt(value)}"]
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format.
+
+    Recording is a dict lookup plus a short critical section, with no I/O
+    and no allocation beyond the first use of a label combination. Each
+    gunicorn worker keeps its own registry, so a scrape sees the worker
+    that served it.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn):
+        return self._add(CallbackMetric(name, help, fn))
+
+    def counter_from(self, name, help, fn):
+        """Counter whose running total is kept elsewhere and read at scrape time."""
+        return self._add(CallbackMetric(name, help, fn, kind="counter"))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    @contextmanager
+    def disabled(self):
+        """Record nothing inside the block; the baseline for overhead measurements."""
+        recorded = [m for m in self._metrics if isinstance(m, _Metric)]
+        for metric in recorded:
+            metric.labels = lambda *values: _NULL_CHILD
+        try:
+            yield
+        finally:
+            for metric in recorded:
+                del metric.labels
+
+
+def overhead_per_call(fn, baseline, repeats=5, number=20000):
+    """Best-of-`repeats` extra seconds per call of `fn` over `baseline`."""
+    def best(f):
+        runs = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(number):
+                f()
+            runs.append((time.perf_counter() - started) / number)
+        return min(runs)
+    return best(fn) - best(baseline)
+
+
+# Upper bounds for the self-check below: a few microseconds per recorded
+# event, against request handlers that take milliseconds (the per-request
+# bound for the service is checked by `python fire_service.py --check-metrics`)
+MAX_OBSERVE_SECONDS = 5e-6
+MAX_TIMER_SECONDS = 10e-6
+
+
+if __name__ == "__main__":
+    registry = MetricsRegistry()
+    stages = registry.histogram("demo_stage_seconds", "Stage latency", ["endpoint", "stage"])
+    batches = registry.histogram("demo_batch_rows", "Rows per call", buckets=BATCH_BUCKETS)
+    errors = registry.counter("demo_errors_total", "Errors", ["upstream", "kind"])
+
+    def noop():
+        pass
+
+    def timed():
+        with stages.labels("report", "inference").time():
+            pass
+
+    observe = overhead_per_call(lambda: batches.observe(37), noop)
+    timer = overhead_per_call(timed, noop)
+    count = overhead_per_call(lambda: errors.labels("waqi", "timeout").inc(), noop)
+    print(f"{'operation':<24}{'us_per_call':>12}")
+    print(f"{'histogram observe':<24}{observe * 1e6:>12.3f}")
+    print(f"{'labelled stage timer':<24}{timer * 1e6:>12.3f}")
+    print(f"{'labelled counter inc':<24}{count * 1e6:>12.3f}")
+    assert observe < MAX_OBSERVE_SECONDS, f"observe overhead {observe * 1e6:.2f} us exceeds bound"
+    assert timer < MAX_TIMER_SECONDS, f"timer overhead {timer * 1e6:.2f} us exceeds bound"
+    assert count < MAX_OBSERVE_SECONDS, f"counter overhead {count * 1e6:.2f} us exceeds bound"
+
+    # Concurrent recording must not lose updates
+    def hammer():
+        for _ in range(10000):
+            errors.labels("waqi", "timeout").inc()
+            batches.observe(3)
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    text = registry.render()
+    assert "demo_batch_rows_bucket{le=\"4\"}" in text and "demo_batch_rows_count" in text
+    with registry.disabled():
+        errors.labels("waqi", "timeout").inc()
+        with stages.labels("report", "inference").time():
+            pass
+    expected = 5 * 20000 + 80000
+    assert f'demo_errors_total{{upstream="waqi",kind="timeout"}} {expected}' in text, text
+    print("Overhead within bounds; exposition and concurrent counts OK")
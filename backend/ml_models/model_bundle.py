@@ -0,0 +1,340 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from model_registry import Versioned, file_checksum
+from tree_model import ARRAY_NAMES, forest_tree_arrays, load_trees, xgb_tree_arrays
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INTEGRATED_BUNDLE_DIR = os.path.join(SCRIPT_DIR, "fire_risk_integrated")
+FOREST_BUNDLE_DIR = os.path.join(SCRIPT_DIR, "fire_risk_model")
+# Written by train_fire_risk_integrated.py next to the model; holds its metrics
+REPORT_PATH = os.path.join(SCRIPT_DIR, "fire_analysis_report.json")
+
+BUNDLE_FORMAT = 1
+# File in the bundle root naming the active version directory
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+NATIVE_MODEL_FILE = "model.ubj"
+TREES_DIR = "trees"
+# Older versions kept next to the active one (for rollback)
+KEEP_VERSIONS = 3
+
+# Loaders in order of preference: memory-mapped tree arrays need no
+# unpickling or library import; the native booster needs xgboost
+FORMATS = ["trees", "native"]
+
+
+def training_data_hash(X, y=None):
+    """sha256 over the training matrix (and labels): dtype, shape and raw bytes."""
+    digest = hashlib.sha256()
+    for values in (X, y):
+        if values is None:
+            continue
+        arr = np.ascontiguousarray(np.asarray(values))
+        digest.update(f"{arr.dtype.str}{arr.shape}".encode())
+        digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+
+def _library_versions(*names):
+    versions = {"numpy": np.__version__}
+    for name in names:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def current_path(bundle_dir):
+    return os.path.join(bundle_dir, CURRENT_FILE)
+
+
+def current_version(bundle_dir):
+    with open(current_path(bundle_dir)) as f:
+        return f.read().strip()
+
+
+def read_manifest(bundle_dir, version=None):
+    version = version or current_version(bundle_dir)
+    with open(os.path.join(bundle_dir, version, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("bundle_format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('bundle_format')} in {bundle_dir}/{version}")
+    return manifest
+
+
+def write_bundle(bundle_dir, manifest, arrays=None, tree_params=None, write_native=None):
+    """Write a new bundle version and make it current.
+
+    The version directory is assembled in a temporary directory and renamed
+    into place, then CURRENT is swapped atomically, so readers (and the
+    service's hot reload, which watches CURRENT) never see a partial bundle.
+    Tree arrays are stored as uncompressed `.npy` files so they can be
+    memory-mapped; `write_native(path)` saves the library's own format.
+    """
+    os.makedirs(bundle_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=bundle_dir)
+    try:
+        if write_native is not None:
+            write_native(os.path.join(tmp_dir, NATIVE_MODEL_FILE))
+        if arrays is not None:
+            os.makedirs(os.path.join(tmp_dir, TREES_DIR))
+            for name in ARRAY_NAMES:
+                np.save(os.path.join(tmp_dir, TREES_DIR, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+
+        files = {}
+        for root, _, names in os.walk(tmp_dir):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, tmp_dir).replace(os.sep, "/")
+                files[rel] = {"bytes": os.path.getsize(path), "sha256": file_checksum(path)}
+        content_hash = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{content_hash[:8]}"
+
+        manifest = {
+            "bundle_format": BUNDLE_FORMAT,
+            "version": version,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            **manifest,
+            "formats": [f for f, present in (("trees", arrays is not None), ("native", write_native is not None))
+                        if present],
+            "trees": tree_params,
+            "files": files,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        version_dir = os.path.join(bundle_dir, version)
+        if os.path.isdir(version_dir):
+            shutil.rmtree(version_dir)
+        os.rename(tmp_dir, version_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    tmp_current = f"{current_path(bundle_dir)}.{os.getpid()}.tmp"
+    with open(tmp_current, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_current, current_path(bundle_dir))
+    _prune(bundle_dir, version)
+    print(f"Wrote model bundle {bundle_dir}/{version} ({', '.join(manifest['formats'])})")
+    return version
+
+
+def _prune(bundle_dir, current):
+    versions = sorted(name for name in os.listdir(bundle_dir)
+                      if os.path.isfile(os.path.join(bundle_dir, name, MANIFEST_FILE)))
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != current:
+            shutil.rmtree(os.path.join(bundle_dir, name), ignore_errors=True)
+
+
+def save_xgb_bundle(model, bundle_dir, feature_names, metrics, X=None, y=None, extra=None):
+    """Bundle an XGBClassifier: native UBJSON booster plus its flattened trees."""
+    arrays, params = xgb_tree_arrays(model)
+    manifest = {
+        "kind": "xgboost_classifier",
+        "feature_names": list(feature_names),
+        "training_data_sha256": training_data_hash(X, y) if X is not None else None,
+        "training_rows": int(len(X)) if X is not None else None,
+        "metrics": metrics,
+        "libraries": _library_versions("xgboost", "sklearn"),
+        **(extra or {}),
+    }
+    # XGBClassifier.save_model keeps the sklearn wrapper attributes too
+    return write_bundle(bundle_dir, manifest, arrays, params, write_native=model.save_model)
+
+
+def save_forest_bundle(model, bundle_dir, feature_names, metrics, X=None, y=None, extra=None):
+    """Bundle a scikit-learn random forest regressor as memory-mappable tree arrays (no pickle)."""
+    arrays, params = forest_tree_arrays(model)
+    manifest = {
+        "kind": "random_forest_regressor",
+        "feature_names": list(feature_names),
+        "training_data_sha256": training_data_hash(X, y) if X is not None else None,
+        "training_rows": int(len(X)) if X is not None else None,
+        "metrics": metrics,
+        "libraries": _library_versions("sklearn"),
+        **(extra or {}),
+    }
+    return write_bundle(bundle_dir, manifest, arrays, params)
+
+
+def load_bundle_trees(bundle_dir, version=None, mmap=True):
+    """NumPy evaluator over the bundle's `.npy` arrays, memory-mapped read-only by default.
+
+    Mapped pages come from the page cache, so every worker process shares
+    one copy of the trees.
+    """
+    version = version or current_version(bundle_dir)
+    manifest = read_manifest(bundle_dir, version)
+    if "trees" not in manifest["formats"]:
+        raise ValueError(f"Bundle {bundle_dir}/{version} has no tree arrays")
+    tree_dir = os.path.join(bundle_dir, version, TREES_DIR)
+    arrays = {name: np.load(os.path.join(tree_dir, f"{name}.npy"), mmap_mode="r" if mmap else None,
+                            allow_pickle=False)
+              for name in ARRAY_NAMES}
+    return load_trees({**manifest["trees"], **arrays})
+
+
+def load_bundle_native(bundle_dir, version=None):
+    """The bundle's booster via XGBoost's own loader (needs xgboost installed)."""
+    import xgboost as xgb
+
+    version = version or current_version(bundle_dir)
+    manifest = read_manifest(bundle_dir, version)
+    if manifest["kind"] != "xgboost_classifier" or "native" not in manifest["formats"]:
+        raise ValueError(f"Bundle {bundle_dir}/{version} has no native XGBoost model")
+    model = xgb.XGBClassifier()
+    model.load_model(os.path.join(bundle_dir, version, NATIVE_MODEL_FILE))
+    return model
+
+
+def bundle_loader(prefer=None):
+    """Loader for ModelRegistry(current_path(bundle_dir), ...).
+
+    Tries the formats in `FORMATS` order (or `prefer` first) and returns the
+    first that loads, so a bundle without tree arrays, or a host without
+    xgboost, still gets a model. The model comes back as Versioned with the
+    manifest's version, so /health reports what was deployed rather than a
+    hash of the CURRENT pointer.
+    """
+    order = [prefer] + [f for f in FORMATS if f != prefer] if prefer in FORMATS else FORMATS
+
+    def load(pointer_path):
+        bundle_dir = os.path.dirname(pointer_path)
+        version = current_version(bundle_dir)
+        manifest = read_manifest(bundle_dir, version)
+        formats = manifest["formats"]
+        errors = []
+        for fmt in order:
+            if fmt not in formats:
+                continue
+            try:
+                if fmt == "trees":
+                    return Versioned(load_bundle_trees(bundle_dir, version), manifest["version"])
+                return Versioned(load_bundle_native(bundle_dir, version), manifest["version"])
+            except (ImportError, OSError, ValueError) as e:
+                errors.append(f"{fmt}: {e}")
+        raise ValueError(f"No loadable format in {bundle_dir}/{version}: {'; '.join(errors) or formats}")
+
+    return load
+
+
+def _bench_load(kind, path):
+    """Cold import + load in a fresh interpreter; run in a subprocess."""
+    started = time.perf_counter()
+    if kind == "pickle":
+        import joblib
+        joblib.load(path)
+    elif kind == "native":
+        load_bundle_native(path)
+    else:
+        model = load_bundle_trees(path, mmap=(kind == "trees-mmap"))
+        # Touch every page so the timing includes actually reading the arrays
+        for name in ARRAY_NAMES:
+            np.asarray(getattr(model, name)).sum()
+    elapsed = time.perf_counter() - started
+    # Current RSS (ru_maxrss would include the parent's footprint at fork)
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    print(f"{elapsed:.4f},{rss_kb}")
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, n)) for root, _, names in os.walk(path) for n in names)
+    return os.path.getsize(path)
+
+
+def benchmark_cold_loads(candidates, repeats=3):
+    """Best-of-`repeats` cold load per (label, kind, path, artifact), each in a fresh interpreter."""
+    print(f"{'artifact':<34}{'bytes':>12}{'seconds':>10}{'rss_mb':>9}")
+    for label, kind, path, artifact in candidates:
+        if not os.path.exists(artifact):
+            continue
+        runs = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--bench-load", kind, path],
+                                 capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+            elapsed, rss_kb = out.split(",")
+            runs.append((float(elapsed), int(rss_kb)))
+        elapsed, rss_kb = min(runs)
+        print(f"{label:<34}{_size(artifact):>12}{elapsed:>10.4f}{rss_kb / 1024:>9.1f}")
+
+
+def convert_integrated_pickle(pickle_path, bundle_dir=INTEGRATED_BUNDLE_DIR, report_path=REPORT_PATH):
+    """Bundle an existing pickled XGBClassifier; metrics come from the analysis report if present."""
+    import joblib
+
+    model = joblib.load(pickle_path)
+    metrics = {}
+    if report_path and os.path.exists(report_path):
+        with open(report_path) as f:
+            metrics = json.load(f).get("model_details", {}).get("metrics", {})
+    feature_names = model.get_booster().feature_names or []
+    save_xgb_bundle(model, bundle_dir, feature_names, metrics, extra={"source": os.path.basename(pickle_path)})
+    return model
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "--bench-load":
+        _bench_load(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    # Convert the committed integrated model into a bundle, verify it and
+    # compare cold loads of every format. The bundle goes to a scratch
+    # directory unless --convert asks to replace the live one (the service
+    # hot-reloads from it).
+    from tree_model import PICKLE_PATH, check_parity
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_dir = INTEGRATED_BUNDLE_DIR if "--convert" in sys.argv else os.path.join(tmp, "fire_risk_integrated")
+        model = convert_integrated_pickle(PICKLE_PATH, bundle_dir)
+        print(f"Trees parity vs predict_proba: max abs diff {check_parity(model, load_bundle_trees(bundle_dir)):.2e}")
+        native = load_bundle_native(bundle_dir)
+        X = np.random.default_rng(0).uniform(0, 0.01, (1000, len(model.get_booster().feature_names or [0, 0, 0])))
+        assert np.array_equal(native.predict_proba(X), model.predict_proba(X)), "native bundle differs from pickle"
+        version_dir = os.path.join(bundle_dir, current_version(bundle_dir))
+
+        candidates = [
+            ("xgboost pickle (joblib)", "pickle", PICKLE_PATH, PICKLE_PATH),
+            ("xgboost native (model.ubj)", "native", bundle_dir, os.path.join(version_dir, NATIVE_MODEL_FILE)),
+            ("xgboost trees (.npy, read)", "trees-read", bundle_dir, os.path.join(version_dir, TREES_DIR)),
+            ("xgboost trees (.npy, mmap)", "trees-mmap", bundle_dir, os.path.join(version_dir, TREES_DIR)),
+        ]
+
+        if "--forest" in sys.argv:
+            # fire_model.py-sized random forest on synthetic rows
+            import joblib
+            from sklearn.ensemble import RandomForestRegressor
+
+            rng = np.random.default_rng(42)
+            Xf = rng.uniform(0, 1, (1000, 6))
+            yf = Xf @ rng.uniform(0, 100, 6) + rng.normal(0, 5, 1000)
+            forest = RandomForestRegressor(n_estimators=100, random_state=42).fit(Xf, yf)
+            forest_pickle = os.path.join(tmp, "forest.pkl")
+            joblib.dump(forest, forest_pickle)
+            forest_dir = os.path.join(tmp, "forest")
+            save_forest_bundle(forest, forest_dir, [f"x{i}" for i in range(6)], {}, Xf, yf)
+            Xq = rng.uniform(-0.1, 1.1, (5000, 6)).astype(np.float32)
+            diff = np.max(np.abs(forest.predict(Xq) - load_bundle_trees(forest_dir).predict(Xq)))
+            assert diff < 1e-3, f"forest bundle differs from predict by {diff}"
+            print(f"Forest parity vs predict: max abs diff {diff:.2e}")
+            forest_trees = os.path.join(forest_dir, current_version(forest_dir), TREES_DIR)
+            candidates += [
+                ("forest pickle (joblib)", "pickle", forest_pickle, forest_pickle),
+                ("forest trees (.npy, read)", "trees-read", forest_dir, forest_trees),
+                ("forest trees (.npy, mmap)", "trees-mmap", forest_dir, forest_trees),
+            ]
+        print(f"\nBundle version {os.path.basename(version_dir)}")
+        benchmark_cold_loads(candidates)
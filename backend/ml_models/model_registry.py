@@ -0,0 +1,121 @@
+import gc
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+import joblib
+
+# Immutable snapshot handed to request handlers; a reload swaps in a new one
+# so in-flight requests keep scoring with the model they started with.
+LoadedModel = namedtuple("LoadedModel", ["model", "version", "fingerprint", "loaded_at", "load_seconds"])
+
+EMPTY_MODEL = LoadedModel(None, None, None, None, None)
+
+# What a loader returns when the artifact carries its own version (e.g. a
+# bundle manifest); a bare model is versioned by the watched file's checksum.
+Versioned = namedtuple("Versioned", ["model", "version"])
+
+
+def file_fingerprint(path):
+    """Cheap identity of a model artifact: changes whenever the file is replaced."""
+    st = os.stat(path)
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Lazily loaded, hot-reloadable model artifact.
+
+    The artifact is loaded on the first `get()` (or eagerly via `preload()`
+    before gunicorn forks its workers). Afterwards the file's mtime/size is
+    re-checked at most every `check_interval` seconds; when it changes the new
+    model is loaded off to the side and swapped in with a single reference
+    assignment, while other requests keep using the previous snapshot.
+    """
+
+    def __init__(self, path, loader=joblib.load, check_interval=5.0):
+        self.path = path
+        self.loader = loader
+        self.check_interval = check_interval
+        self._active = EMPTY_MODEL
+        self._checked_at = None
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.load_errors = 0
+
+    def get(self):
+        """Return the active LoadedModel snapshot, loading or reloading if needed."""
+        # The check time is only stamped once a check has finished, so threads
+        # arriving during the first load wait for it instead of serving nothing
+        if self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval:
+            self._maybe_reload()
+        return self._active
+
+    def preload(self):
+        """Load now and freeze the heap so forked workers share it copy-on-write."""
+        self._maybe_reload(block=True)
+        gc.freeze()
+        return self._active
+
+    def _maybe_reload(self, block=False):
+        try:
+            fingerprint = file_fingerprint(self.path)
+        except OSError:
+            self._checked_at = time.monotonic()
+            return
+        if fingerprint == self._active.fingerprint:
+            self._checked_at = time.monotonic()
+            return
+        # First load blocks everyone (there is nothing to serve yet); later
+        # reloads are done by one thread while the others keep the old model.
+        if not self._reload_lock.acquire(blocking=block or self._active.model is None):
+            return
+        try:
+            if fingerprint == self._active.fingerprint:
+                return
+            started = time.perf_counter()
+            try:
+                model = self.loader(self.path)
+                if isinstance(model, Versioned):
+                    model, version = model
+                else:
+                    version = file_checksum(self.path)[:12]
+            except Exception as e:
+                self.load_errors += 1
+                print(f"Error loading model from {self.path}: {e}")
+                return
+            replacing = self._active.model is not None
+            self._active = LoadedModel(
+                model=model,
+                version=version,
+                fingerprint=fingerprint,
+                loaded_at=time.time(),
+                load_seconds=time.perf_counter() - started
+            )
+            if replacing:
+                self.reloads += 1
+                print(f"Reloaded model {os.path.basename(self.path)} (version {version})")
+        finally:
+            self._checked_at = time.monotonic()
+            self._reload_lock.release()
+
+    def info(self):
+        active = self._active
+        return {
+            "path": os.path.basename(self.path),
+            "loaded": active.model is not None,
+            "version": active.version,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(active.loaded_at)) if active.loaded_at else None,
+            "load_seconds": round(active.load_seconds, 4) if active.load_seconds is not None else None,
+            "reloads": self.reloads,
+            "load_errors": self.load_errors
+        }
@@ -0,0 +1,145 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import multiprocessing
+
+# Native thread pools that would otherwise each grab every core in every worker
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS",
+]
+
+
+def species_from_file(path):
+    """'panthera_tigris_time_series.csv' or '.../species_key=panthera_tigris' -> 'Panthera Tigris'."""
+    name = os.path.basename(path.rstrip(os.sep)).split("=", 1)[-1]
+    return name.replace("_time_series.csv", "").replace("_", " ").title()
+
+
+def default_workers():
+    return int(os.getenv("WILDLIFE_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+@contextmanager
+def _thread_limits(threads):
+    """Set BLAS/OpenMP/TF thread env vars while worker processes are spawned."""
+    previous = {k: os.environ.get(k) for k in THREAD_ENV_VARS}
+    os.environ.update({k: str(threads) for k in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for k, v in previous.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def _init_worker(threads):
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def _run_one(train_fn, path):
+    """Train one species, returning (species, result, error) instead of raising."""
+    species = species_from_file(path)
+    try:
+        return species, train_fn(path), None
+    except Exception:
+        return species, None, traceback.format_exc()
+
+
+def _pool(workers, threads):
+    # spawn: workers start clean (no inherited TF/BLAS state) and pick up the thread limits
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker, initargs=(threads,))
+
+
+def _run_isolated(train_fn, path, threads):
+    """Train one species in a process of its own, so a crash is pinned on it alone."""
+    with _pool(1, threads) as pool:
+        try:
+            return pool.submit(_run_one, train_fn, path).result()
+        except BrokenProcessPool as e:
+            return species_from_file(path), None, f"worker process crashed: {e}"
+        except Exception as e:
+            return species_from_file(path), None, f"worker failed: {e!r}"
+
+
+def train_species_parallel(train_fn, paths, workers=None, threads_per_worker=None):
+    """Run `train_fn(path)` for every species file, one process per species.
+
+    `train_fn` must be a module-level function returning a JSON-serializable
+    result (or None to skip the species). Results are merged in sorted
+    species order regardless of completion order, and a species that raises
+    (or crashes its worker) is reported in `failures` without aborting the
+    others. A worker that dies outright (os._exit, segfault, OOM kill) breaks
+    the shared pool and every pending species with it, so species left
+    unfinished are re-run one process each, and only the one that crashes
+    again is reported. Returns (results, failures), both dicts keyed by
+    species name. With one worker (or one species) everything runs inline
+    in this process.
+    """
+    workers = workers or default_workers()
+    threads = threads_per_worker or int(os.getenv("WILDLIFE_THREADS_PER_WORKER", 1))
+    outcomes = []
+
+    if workers <= 1 or len(paths) <= 1:
+        outcomes = [_run_one(train_fn, p) for p in paths]
+    else:
+        unfinished = []
+        with _thread_limits(threads):
+            with _pool(min(workers, len(paths)), threads) as pool:
+                futures = {pool.submit(_run_one, train_fn, p): p for p in paths}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        outcomes.append(future.result())
+                    except BrokenProcessPool:
+                        unfinished.append(path)
+                    except Exception as e:
+                        outcomes.append((species_from_file(path), None, f"worker failed: {e!r}"))
+
+            if unfinished:
+                print(f"A training worker crashed; retrying {len(unfinished)} unfinished species in separate processes")
+                with ThreadPoolExecutor(max_workers=min(workers, len(unfinished))) as retry:
+                    outcomes.extend(retry.map(lambda p: _run_isolated(train_fn, p, threads), sorted(unfinished)))
+
+    results, failures = {}, {}
+    for species, result, error in sorted(outcomes, key=lambda o: o[0]):
+        if error is not None:
+            failures[species] = error
+            print(f"Error training {species}:\n{error}")
+        elif result is not None:
+            results[species] = result
+    return results, failures
+
+
+def _selfcheck_train(path):
+    """Stand-in train_fn: one species exits its process, one raises."""
+    if "crash" in path:
+        os._exit(1)
+    if "raise" in path:
+        raise ValueError("bad series")
+    return len(path)
+
+
+if __name__ == "__main__":
+    # A hard worker crash must only fail its own species
+    names = ["a", "b", "crash", "c", "raise", "d", "e"]
+    results, failures = train_species_parallel(_selfcheck_train, [f"{n}_time_series.csv" for n in names],
+                                               workers=3)
+    print("RESULTS", sorted(results), "FAILURES", sorted(failures))
+    assert sorted(results) == ["A", "B", "C", "D", "E"], results
+    assert sorted(failures) == ["Crash", "Raise"], failures
+    assert "crashed" in failures["Crash"] and "ValueError" in failures["Raise"], failures
+    print("Per-species failure isolation OK")
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache for model scores keyed on exact feature rows.
+
+    Keys are a row's float32 bytes (see `row_keys`), the precision the tree
+    models compare at, so a hit returns exactly what scoring the row would.
+    Every key is scoped to a model fingerprint: when `sync(fingerprint)` sees a
+    new fingerprint (the model file was replaced) all entries are dropped.
+    """
+
+    def __init__(self, maxsize=4096, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.fingerprint = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def row_keys(features):
+        """One hashable key per row of a 2-D feature array."""
+        return [row.tobytes() for row in np.ascontiguousarray(features, dtype=np.float32)]
+
+    def sync(self, fingerprint):
+        """Drop every entry if the model fingerprint changed."""
+        if fingerprint == self.fingerprint:
+            return
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.fingerprint = fingerprint
+
+    def get_many(self, keys):
+        """Return a list of cached scores (None for misses), refreshing LRU order."""
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[0] >= self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    results.append(entry[1])
+        return results
+
+    def put_many(self, items, fingerprint):
+        """Store (key, score) pairs computed by the model with `fingerprint`."""
+        now = time.monotonic()
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                # Model changed while these were being computed; don't mix versions
+                return
+            for key, value in items:
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_fingerprint": self.fingerprint
+            }
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+# One encoded report: body bytes plus the validators served with it
+Snapshot = namedtuple("Snapshot", ["body", "etag", "built_at", "version", "build_seconds"])
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution.
+
+    The first caller runs `fn`; callers arriving while it is in flight wait
+    for and share its result (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Returns (result, shared) where shared is True for callers that waited."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+
+        try:
+            call["result"] = fn()
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["done"].set()
+        return call["result"], False
+
+
+class ReportSnapshots:
+    """Precomputed, encoded reports refreshed by a background thread.
+
+    `build(key)` produces the report for a key (e.g. the forecast horizon)
+    and `encode(report)` its response body. Keys in `warm_keys` are rebuilt
+    every `interval` seconds; any snapshot older than twice that, or built
+    with a different model version than `version_fn()` returns, is rebuilt
+    on request instead. Concurrent rebuilds of one key run only once.
+
+    The scheduler thread is started by the first `get()` in each process,
+    so it survives gunicorn forking workers from a preloaded app.
+    """
+
+    def __init__(self, build, encode, interval=300, warm_keys=(), version_fn=lambda: None):
+        self.build = build
+        self.encode = encode
+        self.interval = interval
+        self.warm_keys = list(warm_keys)
+        self.version_fn = version_fn
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._scheduler_pid = None
+        self.hits = 0
+        self.builds = 0
+        self.coalesced = 0
+        self.refresh_errors = 0
+
+    def _build(self, key):
+        version = self.version_fn()
+        started = time.perf_counter()
+        body = self.encode(self.build(key))
+        snapshot = Snapshot(body, hashlib.sha256(body).hexdigest()[:20], time.time(), version,
+                            time.perf_counter() - started)
+        with self._lock:
+            self._entries[key] = snapshot
+            self.builds += 1
+        return snapshot
+
+    def _fresh(self, snapshot):
+        if snapshot.version != self.version_fn():
+            return False
+        return self.interval > 0 and time.time() - snapshot.built_at < 2 * self.interval
+
+    def refresh(self, key):
+        snapshot, shared = self._flight.do(key, lambda: self._build(key))
+        if shared:
+            with self._lock:
+                self.coalesced += 1
+        return snapshot
+
+    def get(self, key):
+        self._ensure_scheduler()
+        snapshot = self._entries.get(key)
+        if snapshot is not None and self._fresh(snapshot):
+            with self._lock:
+                self.hits += 1
+            return snapshot
+        return self.refresh(key)
+
+    def _ensure_scheduler(self):
+        if self.interval <= 0 or not self.warm_keys or self._scheduler_pid == os.getpid():
+            return
+        with self._lock:
+            if self._scheduler_pid == os.getpid():
+                return
+            self._scheduler_pid = os.getpid()
+        threading.Thread(target=self._run, name="report-refresh", daemon=True).start()
+
+    def _run(self):
+        while True:
+            for key in self.warm_keys:
+                try:
+                    self.refresh(key)
+                except Exception as e:
+                    with self._lock:
+                        self.refresh_errors += 1
+                    print(f"Error refreshing report snapshot {key!r}: {e}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                "snapshots": {str(k): {"age_seconds": round(now - s.built_at, 1), "etag": s.etag,
+                                       "build_seconds": round(s.build_seconds, 3)}
+                              for k, s in self._entries.items()},
+                "interval_seconds": self.interval,
+                "hits": self.hits,
+                "builds": self.builds,
+                "coalesced": self.coalesced,
+                "refresh_errors": self.refresh_errors,
+            }
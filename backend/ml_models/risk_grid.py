@@ -0,0 +1,245 @@
+import os
+import shutil
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from env_data import ERA5_FILES, era5_path, load_era5, zarr_path_for
+from env_sampling import LAT_NAMES, LON_NAMES, TIME_NAMES, find_coord, nearest_index
+
+TILE_SIZE = 256
+
+# Risk 0-100 -> colour ramp (green, yellow, orange, red); missing cells are transparent
+RAMP_STOPS = np.array([0, 25, 50, 75, 100], dtype=np.float64)
+RAMP_COLORS = np.array([
+    [46, 160, 67],
+    [163, 207, 62],
+    [250, 204, 21],
+    [249, 115, 22],
+    [220, 38, 38],
+], dtype=np.float64)
+RAMP_ALPHA = 200
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def encode_png(rgba):
+    """(height, width, 4) uint8 array -> PNG bytes, using only zlib/struct."""
+    height, width = rgba.shape[:2]
+    # Every scanline is prefixed with filter type 0 (None)
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rgba.reshape(height, width * 4)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)) + _png_chunk(b"IEND", b""))
+
+
+def colorize(risk):
+    """(h, w) risk scores with NaN for no data -> (h, w, 4) uint8 RGBA."""
+    valid = ~np.isnan(risk)
+    values = np.where(valid, risk, 0.0)
+    rgba = np.zeros(risk.shape + (4,), dtype=np.uint8)
+    for c in range(3):
+        rgba[..., c] = np.interp(values, RAMP_STOPS, RAMP_COLORS[:, c]).astype(np.uint8)
+    rgba[..., 3] = np.where(valid, RAMP_ALPHA, 0)
+    return rgba
+
+
+def encode_float16(risk):
+    """Row-major little-endian float16 risk values (NaN = no data); compressed per request."""
+    return risk.astype("<f2").tobytes()
+
+
+# Served for tiles that don't touch the grid, without rendering or caching them
+EMPTY_TILE = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+
+def _mercator_lat(y, n):
+    return float(np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n)))))
+
+
+def tile_overlaps(lats, lons, z, x, y):
+    """Whether Web Mercator tile z/x/y intersects the grid's extent (cell centres +- half a cell)."""
+    n = 2 ** z
+    half_lat = abs(lats[1] - lats[0]) / 2 if len(lats) > 1 else 0.125
+    half_lon = abs(lons[1] - lons[0]) / 2 if len(lons) > 1 else 0.125
+    south, north = _mercator_lat(y + 1, n), _mercator_lat(y, n)
+    west, east = x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+    return (south <= lats.max() + half_lat and north >= lats.min() - half_lat
+            and west <= lons.max() + half_lon and east >= lons.min() - half_lon)
+
+
+def tile_lat_lon(z, x, y, size=TILE_SIZE):
+    """Latitudes (rows) and longitudes (columns) of the pixel centres of Web Mercator tile z/x/y."""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lons = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return lats, lons
+
+
+class TileCache:
+    """Encoded rasters on disk under <root>/<model_version>/<data_version>/<key>.
+
+    A new model or data version simply lands in a new directory; directories
+    for other versions are removed the first time a new version is written.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._current = None
+
+    def _path(self, version, key):
+        return os.path.join(self.root, *version, key)
+
+    def get(self, version, key):
+        try:
+            with open(self._path(version, key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, version, key, data):
+        path = self._path(version, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        if self._current != version:
+            self._current = version
+            self._prune(version)
+
+    def _prune(self, version):
+        model_dir = os.path.join(self.root, version[0])
+        for name in os.listdir(self.root):
+            if name != version[0]:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        for name in os.listdir(model_dir):
+            if name != version[1]:
+                shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+
+
+class RiskGrid:
+    """Fire risk for every cell of the ERA5 grid, scored in one vectorized model call.
+
+    Model inputs follow the service's [tp, placeholder, u10] row layout: the
+    first variable of the accumulations cube and of the instantaneous cube,
+    the latter resampled onto the former's grid by nearest neighbour. Rasters
+    are kept in a small in-memory LRU keyed by model version, data version
+    and time step.
+    """
+
+    def __init__(self, dataset_dir=None, max_rasters=8):
+        self.dataset_dir = dataset_dir
+        self.max_rasters = max_rasters
+        self._datasets = None
+        self._data_version = None
+        self._rasters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def data_paths(self):
+        paths = []
+        for kind in ERA5_FILES:
+            nc_path = era5_path(kind, self.dataset_dir)
+            store = zarr_path_for(nc_path)
+            paths.append(store if os.path.isdir(store) else nc_path)
+        return paths
+
+    def data_version(self):
+        """Latest modification time of the ERA5 inputs, or None if they are missing."""
+        try:
+            return f"{max(os.stat(p).st_mtime_ns for p in self.data_paths()):x}"
+        except OSError:
+            return None
+
+    def available(self):
+        return self.data_version() is not None
+
+    def _open(self, data_version):
+        with self._lock:
+            if self._data_version != data_version:
+                # Requests already slicing the old datasets keep their own
+                # references; they close when the last one is dropped
+                self._datasets = load_era5(self.dataset_dir)
+                self._data_version = data_version
+                self._rasters.clear()
+            return self._datasets
+
+    def _time_index(self, ds, when):
+        time_name = find_coord(ds, TIME_NAMES)
+        if not time_name:
+            return None, None
+        times = ds[time_name].values.astype("datetime64[ns]")
+        if when is None:
+            t = len(times) - 1
+        else:
+            t = int(nearest_index(times.astype(np.int64), np.datetime64(when, "ns").astype(np.int64)))
+        return time_name, t
+
+    def _slice(self, ds, when):
+        var = next(iter(ds.data_vars))
+        da = ds[var]
+        if "expver" in da.dims:
+            da = da.isel(expver=0)
+        time_name, t = self._time_index(ds, when)
+        if time_name:
+            da = da.isel({time_name: t})
+        return da, (str(ds[time_name].values[t])[:10] if time_name else None)
+
+    def _require_data(self):
+        data_version = self.data_version()
+        if data_version is None:
+            raise FileNotFoundError(f"ERA5 inputs not found: {', '.join(self.data_paths())}")
+        return data_version
+
+    def raster(self, score_fn, model_version, when=None):
+        """(risk (lat, lon) float32 with NaN for missing cells, lats, lons, time label)."""
+        data_version = self._require_data()
+        ds_ad, ds_ua = self._open(data_version)
+        key = (model_version, data_version, when)
+        with self._lock:
+            if key in self._rasters:
+                self._rasters.move_to_end(key)
+                return self._rasters[key]
+
+        tp, label = self._slice(ds_ad, when)
+        u10, _ = self._slice(ds_ua, when)
+        lat_name, lon_name = find_coord(ds_ad, LAT_NAMES), find_coord(ds_ad, LON_NAMES)
+        lats, lons = ds_ad[lat_name].values, ds_ad[lon_name].values
+        tp = np.asarray(tp.transpose(lat_name, lon_name).values, dtype=np.float64)
+        # Instantaneous cube onto the accumulations grid (usually identical)
+        ua_lat, ua_lon = find_coord(ds_ua, LAT_NAMES), find_coord(ds_ua, LON_NAMES)
+        u10 = np.asarray(u10.transpose(ua_lat, ua_lon).values, dtype=np.float64)
+        u10 = u10[np.ix_(nearest_index(ds_ua[ua_lat].values, lats), nearest_index(ds_ua[ua_lon].values, lons))]
+
+        features = np.column_stack([tp.ravel(), np.zeros(tp.size), u10.ravel()])
+        valid = ~np.isnan(features).any(axis=1)
+        risk = np.full(tp.size, np.nan, dtype=np.float32)
+        if valid.any():
+            risk[valid] = score_fn(features[valid])
+        result = (risk.reshape(tp.shape), lats, lons, label)
+
+        with self._lock:
+            self._rasters[key] = result
+            while len(self._rasters) > self.max_rasters:
+                self._rasters.popitem(last=False)
+        return result
+
+
+def resample_to_tile(risk, lats, lons, z, x, y, size=TILE_SIZE):
+    """Nearest-cell lookup of a lat/lon raster for every pixel of tile z/x/y (NaN outside the grid)."""
+    tile_lats, tile_lons = tile_lat_lon(z, x, y, size)
+    rows = nearest_index(lats, tile_lats)
+    cols = nearest_index(lons, tile_lons)
+    half_lat = abs(lats[1] - lats[0]) / 2 if len(lats) > 1 else 0.125
+    half_lon = abs(lons[1] - lons[0]) / 2 if len(lons) > 1 else 0.125
+    inside_lat = (tile_lats >= lats.min() - half_lat) & (tile_lats <= lats.max() + half_lat)
+    inside_lon = (tile_lons >= lons.min() - half_lon) & (tile_lons <= lons.max() + half_lon)
+    tile = risk[np.ix_(rows, cols)]
+    return np.where(inside_lat[:, None] & inside_lon[None, :], tile, np.nan)
@@ -0,0 +1,173 @@
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Fallback for values the encoder can't handle natively (same rules as the old json_response)."""
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+
+def dumps_stdlib(data):
+    return json.dumps(data, default=_default).encode()
+
+
+def dumps(data):
+    """JSON-encode to bytes.
+
+    With orjson, NumPy scalars and numeric arrays are serialized natively (no
+    per-object Python callback; NaN becomes null). Without it, falls back to
+    stdlib json with the same `default` rules.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+    return dumps_stdlib(data)
+
+
+def choose_encoding(accept_encodings):
+    """Best supported content coding from a werkzeug Accept-Encoding object (or None)."""
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+class EncodedBodies:
+    """Small LRU of compressed bodies for immutable responses, keyed by (key, encoding)."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, encoding, body):
+        cache_key = (key, encoding)
+        with self._lock:
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                return self._entries[cache_key]
+        payload = compress(body, encoding)
+        with self._lock:
+            self._entries[cache_key] = payload
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return payload
+
+
+def encode_body(body, accept_encodings, cache=None, cache_key=None):
+    """(payload, content_encoding) for `body` negotiated against Accept-Encoding.
+
+    When `cache` and `cache_key` are given (the body is immutable for that
+    key, e.g. a snapshot ETag) the compressed bytes are reused.
+    """
+    encoding = choose_encoding(accept_encodings) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding is None:
+        return body, None
+    if cache is not None and cache_key is not None:
+        return cache.get(cache_key, encoding, body), encoding
+    return compress(body, encoding), encoding
+
+
+def _same_json(a, b, rel_tol=1e-6):
+    """Structural equality; floats compare at float32 precision (orjson writes float32 scalars shortest-first)."""
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(_same_json(a[k], b[k], rel_tol) for k in a)
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(_same_json(x, y, rel_tol) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(a - b) <= rel_tol * max(abs(a), abs(b))
+    return a == b
+
+
+def _legacy_json_response_body(data):
+    """The original json_response encoding, kept as the benchmark baseline."""
+    def default(obj):
+        if isinstance(obj, (np.float32, np.float64, np.floating)):
+            return float(obj)
+        if isinstance(obj, (np.int32, np.int64, np.integer)):
+            return int(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return str(obj)
+    return json.dumps(data, default=default)
+
+
+if __name__ == "__main__":
+    # Micro-benchmark on a report-shaped payload full of NumPy scalars
+    rng = np.random.default_rng(0)
+    report = {
+        "regional_analysis": [
+            {
+                "region_name": f"Cell {r}",
+                "current_risk_index": np.float64(rng.uniform(0, 100)),
+                "historical_fire_density": np.float32(rng.uniform(0, 100)),
+                "monthly_forecast": [
+                    {"month": "March", "year": np.int64(2027), "risk_score": np.float64(rng.uniform(5, 95)),
+                     "weather": {"temp": np.float64(rng.uniform(20, 35)), "rain": np.float64(rng.uniform(0, 15))}}
+                    for _ in range(36)
+                ],
+                "scores": rng.uniform(0, 100, 64),
+            }
+            for r in range(200)
+        ]
+    }
+
+    def best_ms(fn, repeats=5):
+        runs = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - started)
+        return min(runs) * 1000
+
+    legacy = _legacy_json_response_body(report).encode()
+    body = dumps(report)
+    assert _same_json(json.loads(legacy), json.loads(body))
+    print(f"encoder: {'orjson' if orjson is not None else 'stdlib'}, body {len(body)} bytes")
+    print(f"{'step':<28}{'best_ms':>10}{'bytes':>10}")
+    print(f"{'legacy json_response':<28}{best_ms(lambda: _legacy_json_response_body(report)):>10.2f}{len(legacy):>10}")
+    print(f"{'dumps (stdlib fallback)':<28}{best_ms(lambda: dumps_stdlib(report)):>10.2f}{len(dumps_stdlib(report)):>10}")
+    print(f"{'dumps':<28}{best_ms(lambda: dumps(report)):>10.2f}{len(body):>10}")
+    print(f"{'gzip':<28}{best_ms(lambda: compress(body, 'gzip')):>10.2f}{len(compress(body, 'gzip')):>10}")
+    if brotli is not None:
+        print(f"{'brotli':<28}{best_ms(lambda: compress(body, 'br')):>10.2f}{len(compress(body, 'br')):>10}")
+    cache = EncodedBodies()
+    cache.get("snapshot", "gzip", body)
+    print(f"{'cached gzip':<28}{best_ms(lambda: cache.get('snapshot', 'gzip', body)):>10.4f}")
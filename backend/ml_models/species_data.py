@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+# Long-format (species, year) dataset written by `wildlife_preprocessing.py --long`,
+# hive-partitioned as species_series/species_key=<slug>/
+SPECIES_DATASET = "species_series"
+PARTITION_COL = "species_key"
+
+
+def species_sources(processed_dir):
+    """One source per species: partitions of the long-format dataset if present, else per-species CSVs."""
+    dataset_dir = os.path.join(processed_dir, SPECIES_DATASET)
+    if os.path.isdir(dataset_dir):
+        parts = sorted(d for d in os.listdir(dataset_dir) if d.startswith(PARTITION_COL + "="))
+        return [os.path.join(dataset_dir, d) for d in parts]
+    if not os.path.isdir(processed_dir):
+        return []
+    files = sorted(f for f in os.listdir(processed_dir) if f.endswith("_time_series.csv"))
+    return [os.path.join(processed_dir, f) for f in files]
+
+
+def read_species(source, columns=None):
+    """Load one species' yearly series from a CSV file or a dataset partition.
+
+    Partitions are read through the dataset root with a species filter, so
+    pyarrow prunes every other species' files instead of scanning them.
+    """
+    if source.endswith(".csv"):
+        df = pd.read_csv(source)
+        return df[columns] if columns is not None else df
+
+    dataset_dir, partition = os.path.split(source.rstrip(os.sep))
+    key = partition.split("=", 1)[1]
+    df = pd.read_parquet(dataset_dir, columns=columns, filters=[(PARTITION_COL, "==", key)])
+    if "year" in df.columns:
+        df = df.sort_values("year")
+    return df.drop(columns=PARTITION_COL, errors="ignore").reset_index(drop=True)
@@ -1,74 +1,56 @@
 import pandas as pd
 import numpy as np
-import xarray as xr
-import glob
 import os
 import json
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import xgboost as xgb
+from env_sampling import GridSampler, sample_pseudo_absences
+from firms_loader import load_fire_archive, SUNDARBANS_BBOX
+from env_data import load_era5
+from model_bundle import save_xgb_bundle
+
+# Pseudo-absence sampling: negatives per positive, and how far (km / days)
+# a negative must be from any fire detection
+NEGATIVE_RATIO = float(os.getenv("NEGATIVE_RATIO", 1.0))
+EXCLUSION_KM = float(os.getenv("EXCLUSION_KM", 10.0))
+EXCLUSION_DAYS = float(os.getenv("EXCLUSION_DAYS", 30))
+RANDOM_SEED = int(os.getenv("RANDOM_SEED", 42))
 
 def train_integrated_model():
     print("Step 1: Loading Datasets...")
     dataset_dir = r"d:\Hackathons\next\backend\datasets"
     
     # 1. Load Fire Archive Data
-    fire_files = glob.glob(os.path.join(dataset_dir, "fire_archive_*.csv"))
-    fire_df_list = []
-    for f in fire_files:
-        temp_df = pd.read_csv(f)
-        fire_df_list.append(temp_df)
-    
-    fire_df = pd.concat(fire_df_list, ignore_index=True)
-    fire_df.columns = fire_df.columns.str.lower()
-    fire_df['acq_date'] = pd.to_datetime(fire_df['acq_date']).dt.tz_localize(None) # Match NC naive time
-    print(f"Loaded {len(fire_df)} fire records.")
+    # Streamed in chunks and filtered to the Sundarbans NC extent (Lat 21.5-22.5,
+    # Lon 88-89) while reading; the filtered result is cached as Parquet
+    fire_df = load_fire_archive(dataset_dir, bbox=SUNDARBANS_BBOX, cache_dir=os.path.join(dataset_dir, "cache"))
+    print(f"Loaded {len(fire_df)} fire records in Sundarbans region.")
 
     # 2. Load Environmental Data (NetCDF)
-    nc_ad_path = os.path.join(dataset_dir, "data_stream-moda_stepType-avgad.nc")
-    nc_ua_path = os.path.join(dataset_dir, "data_stream-moda_stepType-avgua.nc")
-    
-    ds_ad = xr.open_dataset(nc_ad_path)
-    ds_ua = xr.open_dataset(nc_ua_path)
+    # Opened lazily (dask chunks, or the Zarr copy if one exists) and windowed to
+    # the study area; only the window is ever read from disk
+    ds_ad, ds_ua = load_era5(dataset_dir, bbox=SUNDARBANS_BBOX)
 
     print("Step 2: Processing and Alignment...")
-    # Strict Sundarbans Filter based on NC file extent: Lat (21.5-22.5), Lon (88-89)
-    fire_df = fire_df[(fire_df['latitude'] >= 21.5) & (fire_df['latitude'] <= 22.5) & 
-                     (fire_df['longitude'] >= 88.0) & (fire_df['longitude'] <= 89.0)]
-    print(f"Filtered to {len(fire_df)} records in Sundarbans region.")
-
-    def get_env_val(lat, lon, date, ds, var_name):
-        try:
-            coord_map = {}
-            if 'latitude' in ds.coords: coord_map['latitude'] = lat
-            elif 'lat' in ds.coords: coord_map['lat'] = lat
-            
-            if 'longitude' in ds.coords: coord_map['longitude'] = lon
-            elif 'lon' in ds.coords: coord_map['lon'] = lon
 
-            time_dim = None
-            for td in ['valid_time', 'time']:
-                if td in ds.coords:
-                    time_dim = td
-                    break
-            
-            if time_dim:
-                # Align dates by removing time component to daily resolution if needed
-                coord_map[time_dim] = np.datetime64(date.strftime('%Y-%m-%d'))
+    # Nearest-grid samplers: coordinates and variable arrays are read once and
+    # every lookup below is a vectorized gather
+    sampler_ad = GridSampler(ds_ad)
+    sampler_ua = GridSampler(ds_ua)
 
-            subset = ds[var_name]
-            if 'expver' in subset.dims:
-                subset = subset.isel(expver=0)
-            
-            val = subset.sel(**coord_map, method='nearest').values
-            return float(val)
-        except Exception as e:
-            return np.nan
+    def sample_env(lats, lons, times):
+        """v1/v2/v3 feature columns for arrays of (lat, lon, time) points."""
+        idx_ad = sampler_ad.indices(lats, lons, times)
+        idx_ua = sampler_ua.indices(lats, lons, times)
+        veg = sampler_ad.gather(ds1_vars[0], idx_ad)
+        temp = sampler_ad.gather(ds1_vars[1], idx_ad) if len(ds1_vars) > 1 else np.zeros(len(veg))
+        ua = sampler_ua.gather(ds2_vars[0], idx_ua)
+        return veg, temp, ua
 
     # Sampling for positive cases (fire exists)
     print("Sampling environmental data for fire locations...")
-    env_features = []
     
     # Map variables (guessing based on previous inspection)
     # DS1 likely had 'tp' (AD)
@@ -77,55 +59,43 @@ def train_integrated_model():
     ds2_vars = list(ds_ua.data_vars)
     print(f"Found DS1 Vars: {ds1_vars}, DS2 Vars: {ds2_vars}")
 
-    for idx, row in fire_df.sample(min(500, len(fire_df))).iterrows():
-        try:
-            # Dynamically use what is available
-            veg = get_env_val(row['latitude'], row['longitude'], row['acq_date'], ds_ad, ds1_vars[0])
-            temp = get_env_val(row['latitude'], row['longitude'], row['acq_date'], ds_ad, ds1_vars[1]) if len(ds1_vars) > 1 else 0
-            ua = get_env_val(row['latitude'], row['longitude'], row['acq_date'], ds_ua, ds2_vars[0])
-            
-            if not np.isnan(veg) and not np.isnan(ua):
-                env_features.append({
-                    'latitude': row['latitude'],
-                    'longitude': row['longitude'],
-                    'v1': veg,
-                    'v2': temp,
-                    'v3': ua,
-                    'fire': 1
-                })
-        except:
-            continue
+    # Every fire detection is sampled in one pass (no more 500-row cap)
+    veg, temp, ua = sample_env(fire_df['latitude'].values, fire_df['longitude'].values, fire_df['acq_date'].values)
+    positives = pd.DataFrame({
+        'latitude': fire_df['latitude'].values,
+        'longitude': fire_df['longitude'].values,
+        'v1': veg,
+        'v2': temp,
+        'v3': ua,
+        'fire': 1
+    })
+    positives = positives[~np.isnan(positives['v1']) & ~np.isnan(positives['v3'])]
+    print(f"Sampled {len(positives)} fire locations.")
+    env_features = [positives]
 
     # Sampling for negative cases (pseudo-absence)
     print("Generating non-fire samples...")
-    # Randomly pick times and locations from NC
-    # We use ds_ad as the master grid
-    times = ds_ad.valid_time.values
-    lats = ds_ad.latitude.values
-    lons = ds_ad.longitude.values
-    
-    attempts = 0
-    while len(env_features) < 1000 and attempts < 1500:
-        attempts += 1
-        rlat = np.random.choice(lats)
-        rlon = np.random.choice(lons)
-        rtime = pd.to_datetime(np.random.choice(times))
-        
-        veg = get_env_val(rlat, rlon, rtime, ds_ad, ds1_vars[0])
-        temp = get_env_val(rlat, rlon, rtime, ds_ad, ds1_vars[1]) if len(ds1_vars) > 1 else 0
-        ua = get_env_val(rlat, rlon, rtime, ds_ua, ds2_vars[0])
-        
-        if not np.isnan(veg) and not np.isnan(ua):
-            env_features.append({
-                'latitude': rlat,
-                'longitude': rlon,
-                'v1': veg,
-                'v2': temp,
-                'v3': ua,
-                'fire': 0
-            })
-
-    dataset = pd.DataFrame(env_features)
+    # Random grid points/times from the NC master grid (ds_ad), drawn in bulk
+    # and kept only if no fire was detected nearby in space and time
+    n_negative = max(int(len(positives) * NEGATIVE_RATIO), 500)
+    absences = sample_pseudo_absences(
+        sampler_ad, n_negative,
+        fire_df['latitude'].values, fire_df['longitude'].values, fire_df['acq_date'].values,
+        var_names=[ds1_vars[0]],
+        min_distance_km=EXCLUSION_KM, min_days=EXCLUSION_DAYS, seed=RANDOM_SEED
+    )
+    veg, temp, ua = sample_env(absences['latitude'], absences['longitude'], absences['time'])
+    env_features.append(pd.DataFrame({
+        'latitude': absences['latitude'],
+        'longitude': absences['longitude'],
+        'v1': veg,
+        'v2': temp,
+        'v3': ua,
+        'fire': 0
+    }))
+    print(f"Sampled {len(absences['time'])} non-fire locations.")
+
+    dataset = pd.concat(env_features, ignore_index=True)
     print(f"Dataset columns: {dataset.columns}")
     if dataset.empty:
         print("CRITICAL ERROR: No valid samples found! Check coordinate alignment.")
@@ -146,7 +116,7 @@ def train_integrated_model():
         print("Available columns:", dataset.columns)
         return
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=RANDOM_SEED)
 
     print("Step 3: Training Model...")
     model = xgb.XGBClassifier(use_label_encoder=False, eval_metric='logloss')
@@ -253,9 +223,15 @@ def train_integrated_model():
     
     print(f"Report saved to {output_path}")
     
-    # Save model
-    import joblib
-    joblib.dump(model, os.path.join(r"d:\Hackathons\next\backend\ml_models", "fire_risk_integrated_model.pkl"))
+    # Save model as a versioned bundle (native booster + NumPy trees + manifest)
+    save_xgb_bundle(
+        model, os.path.join(r"d:\Hackathons\next\backend\ml_models", "fire_risk_integrated"),
+        feature_names=list(X.columns),
+        metrics=output["model_details"]["metrics"],
+        X=X_train.values, y=y_train.values,
+        extra={"feature_sources": feature_names, "region": output["model_details"]["region"],
+               "period": output["model_details"]["period"]}
+    )
     
     ds_ad.close()
     ds_ua.close()
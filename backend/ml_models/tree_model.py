@@ -0,0 +1,271 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PICKLE_PATH = os.path.join(SCRIPT_DIR, "fire_risk_integrated_model.pkl")
+
+FORMAT_VERSION = 1
+SUPPORTED_OBJECTIVES = {"binary:logistic", "reg:logistic"}
+# Per-node arrays of an exported ensemble; everything else is a scalar parameter
+ARRAY_NAMES = ["feature", "threshold", "left", "default_left", "value", "roots"]
+# Split rules: XGBoost goes left when x < threshold, scikit-learn when x <= threshold
+SPLIT_LESS, SPLIT_LESS_EQUAL = "<", "<="
+# Rows scored per traversal pass; keeps the (rows, trees) node-index matrix cache-sized
+ROW_CHUNK = 1024
+
+
+def _flatten(trees):
+    """Concatenate per-tree node arrays into the level-wise layout.
+
+    `trees` yields (left_children, right_children, feature, threshold,
+    default_left, leaf_value) per tree in the library's own numbering, with
+    -1 children marking leaves. Nodes are renumbered breadth-first so a
+    split's right child is always its left child + 1, and leaves point to
+    themselves, so a fixed number of steps reaches every leaf.
+    """
+    feature, threshold, left, default_left, value, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for lc, rc, feat, thr, dleft, leaf in trees:
+        order, depth = _breadth_first(lc, rc)
+        new_id = np.empty(len(order), dtype=np.int32)
+        new_id[order] = np.arange(len(order), dtype=np.int32)
+        lc = np.asarray(lc, dtype=np.int32)[order]
+        is_leaf = lc == -1
+
+        feature.append(np.where(is_leaf, 0, np.asarray(feat)[order]).astype(np.int32))
+        # +inf sends every (clipped) input back to the leaf itself
+        threshold.append(np.where(is_leaf, np.float32(np.inf), np.asarray(thr, dtype=np.float32)[order]))
+        left.append(np.where(is_leaf, np.arange(len(order)), new_id[np.maximum(lc, 0)]).astype(np.int32) + offset)
+        default_left.append(np.asarray(dleft, dtype=bool)[order] | is_leaf)
+        value.append(np.where(is_leaf, np.asarray(leaf, dtype=np.float32)[order], np.float32(0)))
+        roots.append(offset)
+        max_depth = max(max_depth, depth)
+        offset += len(order)
+
+    arrays = {
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left),
+        "default_left": np.concatenate(default_left),
+        "value": np.concatenate(value),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+    return arrays, max_depth
+
+
+def _breadth_first(left, right):
+    """Node ids in breadth-first order (siblings adjacent) and the tree's depth."""
+    order, frontier, depth = [0], [0], 0
+    while True:
+        frontier = [c for node in frontier if left[node] != -1 for c in (left[node], right[node])]
+        if not frontier:
+            return np.asarray(order), depth
+        order.extend(frontier)
+        depth += 1
+
+
+def xgb_tree_arrays(model):
+    """(arrays, params) for an XGBoost binary:logistic booster, read from its exact JSON model."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in SUPPORTED_OBJECTIVES:
+        raise ValueError(f"Unsupported objective {objective!r}; expected one of {sorted(SUPPORTED_OBJECTIVES)}")
+    trees = learner["gradient_booster"]["model"]["trees"]
+
+    # Match predict_proba when early stopping picked a best iteration
+    try:
+        best_iteration = model.best_iteration
+        trees = trees[:(best_iteration + 1) * max(int(getattr(model, "num_parallel_tree", 1) or 1), 1)]
+    except AttributeError:
+        pass
+    if any(tree.get("categories") for tree in trees):
+        raise ValueError("Categorical splits are not supported")
+
+    # XGBoost keeps a leaf's output in split_conditions
+    arrays, max_depth = _flatten(
+        (t["left_children"], t["right_children"], t["split_indices"], t["split_conditions"], t["default_left"],
+         t["split_conditions"])
+        for t in trees
+    )
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+    params = {
+        "format_version": FORMAT_VERSION,
+        "output": "logistic",
+        "split_rule": SPLIT_LESS,
+        "max_depth": max_depth,
+        # base_score is a probability; the booster adds its logit to the margin
+        "base_margin": float(np.log(base_score / (1 - base_score))),
+        "n_features": int(learner["learner_model_param"]["num_feature"]),
+        "feature_names": list(learner.get("feature_names") or []),
+    }
+    return arrays, params
+
+
+def _float32_at_most(values):
+    """Largest float32 <= each float64, so float32 `x <= t32` matches `x <= t64` exactly."""
+    t32 = np.asarray(values, dtype=np.float32)
+    over = t32.astype(np.float64) > values
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+def forest_tree_arrays(model):
+    """(arrays, params) for a fitted single-output scikit-learn forest regressor."""
+    trees = []
+    for estimator in model.estimators_:
+        t = estimator.tree_
+        if t.value.shape[1] != 1:
+            raise ValueError("Only single-output forests are supported")
+        # Trees fitted without NaNs have no missing_go_to_left; NaN then goes right
+        missing_left = getattr(t, "missing_go_to_left", np.zeros(t.node_count, dtype=bool))
+        trees.append((t.children_left, t.children_right, t.feature, _float32_at_most(t.threshold),
+                      missing_left, t.value[:, 0, 0]))
+    arrays, max_depth = _flatten(trees)
+    params = {
+        "format_version": FORMAT_VERSION,
+        "output": "mean",
+        "split_rule": SPLIT_LESS_EQUAL,
+        "max_depth": max_depth,
+        "base_margin": 0.0,
+        "n_features": int(model.n_features_in_),
+        "feature_names": [str(n) for n in getattr(model, "feature_names_in_", [])],
+    }
+    return arrays, params
+
+
+class _LevelwiseTrees:
+    """Vectorized pure-NumPy traversal of trees in the `_flatten` layout.
+
+    All trees advance one level per step for a whole batch: the current node
+    of every (row, tree) pair is a single int32 matrix, and each step is a
+    handful of take() gathers. Inputs are compared as float32, like XGBoost's
+    DMatrix and scikit-learn's trees; NaN follows each split's default
+    direction. `data` maps ARRAY_NAMES to arrays (plain or memory-mapped)
+    and the parameter names to scalars.
+    """
+
+    def __init__(self, data):
+        if int(data["format_version"]) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree format version {int(data['format_version'])}")
+        self.feature = data["feature"]
+        self.threshold = data["threshold"]
+        self.left = data["left"]
+        self.default_left = data["default_left"]
+        self.value = data["value"]
+        self.roots = data["roots"]
+        self.max_depth = int(data["max_depth"])
+        self.base_margin = float(data["base_margin"])
+        self.split_rule = str(data["split_rule"])
+        self.n_features_in_ = int(data["n_features"])
+        self.feature_names = [str(n) for n in data["feature_names"]]
+
+    def _leaf_sum_chunk(self, X):
+        has_nan = np.isnan(X).any()
+        # Flat offsets of each row's first feature, so one take() reads x[row, feature]
+        row_start = (np.arange(len(X), dtype=np.int32) * X.shape[1])[:, None]
+        X = X.ravel()
+        node = np.broadcast_to(self.roots, (len(row_start), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X.take(row_start + self.feature.take(node))
+            if self.split_rule == SPLIT_LESS:
+                go_right = ~(x < self.threshold.take(node))
+            else:
+                go_right = ~(x <= self.threshold.take(node))
+            if has_nan:
+                go_right &= ~(np.isnan(x) & self.default_left.take(node))
+            node = self.left.take(node) + go_right
+        return self.value.take(node).sum(axis=1, dtype=np.float64)
+
+    def leaf_sum(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+        # +inf would step past a leaf's +inf threshold; no split threshold lies above float32 max
+        X = np.minimum(X, np.finfo(np.float32).max)
+        return np.concatenate([self._leaf_sum_chunk(X[i:i + ROW_CHUNK]) for i in range(0, len(X), ROW_CHUNK)] or [np.empty(0)])
+
+
+class TreeEnsemble(_LevelwiseTrees):
+    """Exported XGBoost binary:logistic booster.
+
+    Exposes `predict_proba`/`predict` so it drops in where the XGBClassifier
+    was used.
+    """
+
+    def margin(self, X):
+        return self.leaf_sum(X) + self.base_margin
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.margin(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)
+
+
+class TreeRegressor(_LevelwiseTrees):
+    """Exported random forest regressor: the mean of the trees' leaf values."""
+
+    def predict(self, X):
+        return self.leaf_sum(X) / len(self.roots)
+
+
+def load_trees(data):
+    """Evaluator for exported tree data, picked by its `output` parameter."""
+    return TreeRegressor(data) if str(data["output"]) == "mean" else TreeEnsemble(data)
+
+
+def check_parity(model, ensemble, n=20000, seed=0, atol=1e-6):
+    """Max |p_numpy - p_xgboost| over random rows, rows on split thresholds and NaNs."""
+    rng = np.random.default_rng(seed)
+    n_features = ensemble.n_features_in_
+    # Span each feature's split range, plus rows sitting exactly on thresholds
+    splits = np.isfinite(ensemble.threshold)
+    lo = np.array([ensemble.threshold[splits & (ensemble.feature == f)].min(initial=0) for f in range(n_features)])
+    hi = np.array([ensemble.threshold[splits & (ensemble.feature == f)].max(initial=1) for f in range(n_features)])
+    span = np.maximum(hi - lo, 1e-6)
+    X = rng.uniform(lo - 0.1 * span, hi + 0.1 * span, size=(n, n_features))
+    on_split = rng.choice(np.flatnonzero(splits), n // 4)
+    X[np.arange(n // 4), ensemble.feature[on_split]] = ensemble.threshold[on_split]
+    X[-20:-10], X[-10:] = np.inf, -np.inf
+    X[rng.random(X.shape) < 0.02] = np.nan
+
+    expected = model.predict_proba(X)[:, 1]
+    actual = ensemble.predict_proba(X)[:, 1]
+    max_diff = float(np.max(np.abs(expected - actual)))
+    assert max_diff <= atol, f"NumPy evaluator differs from predict_proba by {max_diff}"
+    return max_diff
+
+
+def benchmark(model, ensemble):
+    rng = np.random.default_rng(1)
+    print(f"{'batch':>8}{'xgboost_ms':>12}{'numpy_ms':>10}")
+    for batch in [1, 64, 1000, 100000]:
+        X = rng.uniform(0, 1, (batch, ensemble.n_features_in_))
+        timings = []
+        for fn in (model.predict_proba, ensemble.predict_proba):
+            fn(X)
+            started = time.perf_counter()
+            for _ in range(5):
+                fn(X)
+            timings.append((time.perf_counter() - started) / 5 * 1000)
+        print(f"{batch:>8}{timings[0]:>12.3f}{timings[1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    # Check the NumPy evaluator against the pickled model (model_bundle.py
+    # writes the artifacts and benchmarks cold loads)
+    import joblib
+
+    model = joblib.load(PICKLE_PATH)
+    arrays, params = xgb_tree_arrays(model)
+    ensemble = load_trees({**params, **arrays})
+    print(f"{len(arrays['roots'])} trees, {len(arrays['left'])} nodes, depth {params['max_depth']}")
+    print(f"Parity vs predict_proba: max abs diff {check_parity(model, ensemble):.2e}")
+    if "--benchmark" in sys.argv:
+        benchmark(model, ensemble)
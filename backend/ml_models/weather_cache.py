@@ -0,0 +1,98 @@
+import threading
+import time
+
+
+class WeatherCache:
+    """TTL cache for per-location weather lookups with stale-while-revalidate.
+
+    Entries are keyed by lat/lon rounded to `precision` decimals, so nearby
+    requests from the dashboard share one upstream call. A fresh entry is served
+    directly; an entry older than `ttl` but younger than `ttl + stale_ttl` is
+    served immediately while a single background refresh is scheduled.
+    """
+
+    def __init__(self, ttl=600, stale_ttl=1800, precision=2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.precision = precision
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def key(self, lat, lon):
+        return (round(float(lat), self.precision), round(float(lon), self.precision))
+
+    def get(self, lat, lon, loader, executor=None):
+        """Return cached weather for (lat, lon), calling `loader()` when needed.
+
+        `loader` must return a weather dict or None; failed loads are not cached.
+        When `executor` is given, stale entries are refreshed on it in the background.
+        """
+        key = self.key(lat, lon)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self.hits += 1
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    schedule = key not in self._refreshing
+                    if schedule:
+                        self._refreshing.add(key)
+                else:
+                    entry = None
+            if entry is None:
+                self.misses += 1
+
+        if entry is None:
+            value = loader()
+            self._store(key, value)
+            return value
+
+        if schedule:
+            if executor is not None:
+                executor.submit(self._refresh, key, loader)
+            else:
+                self._refresh(key, loader)
+        return entry[1]
+
+    def _refresh(self, key, loader):
+        try:
+            value = loader()
+            self._store(key, value)
+            with self._lock:
+                self.refreshes += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, value):
+        if value is None:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "background_refreshes": self.refreshes,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl
+            }
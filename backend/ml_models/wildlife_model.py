@@ -1,10 +1,15 @@
-import pandas as pd
 import numpy as np
 import os
+import sys
+import time
 import json
 from sklearn.preprocessing import MinMaxScaler
 from keras.models import Sequential
 from keras.layers import LSTM, Dense, Dropout
+from parallel_training import species_from_file, train_species_parallel
+from lstm_rollout import rollout, trend_exog
+from windowing import sliding_windows, stacked_windows
+from species_data import read_species, species_sources
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,163 +18,293 @@ PROCESSED_DATA_DIR = os.path.join(BACKEND_DIR, "datasets", "wildlife_processed")
 MODEL_OUTPUT_DIR = SCRIPT_DIR
 os.makedirs(MODEL_OUTPUT_DIR, exist_ok=True)
 
+# Features: habitat_stress_index, anthropogenic_pressure_score, population_proxy
+FEATURES = ["habitat_stress_index", "anthropogenic_pressure_score", "population_proxy"]
+# Given small dataset (yearly), we'll use a sequence length of 3
+SEQ_LENGTH = 3
+
+# Forecast horizon (years) and optional Monte-Carlo scenario count per species
+FORECAST_HORIZON = 10
+ROLLOUT_SCENARIOS = int(os.getenv("ROLLOUT_SCENARIOS", 0))
+
+# "per-species": one LSTM per species file; "global": one shared LSTM with a species ID input
+LSTM_MODE = os.getenv("WILDLIFE_LSTM_MODE", "per-species")
+
 def create_sequences(data, seq_length):
-    xs = []
-    ys = []
-    for i in range(len(data) - seq_length):
-        x = data[i:(i + seq_length)]
-        y = data[i + seq_length, 2] 
-        xs.append(x)
-        ys.append(y)
-    return np.array(xs), np.array(ys)
-
-def train_and_forecast_lstm():
-    forecasts = {}
-    files = [f for f in os.listdir(PROCESSED_DATA_DIR) if f.endswith("_time_series.csv")]
-    
-    for file in files:
-        species_name = file.replace("_time_series.csv", "").replace("_", " ").title()
-        print(f"Training LSTM model for {species_name}...")
-        
-        df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, file))
-        
-        # Features: habitat_stress_index, anthropogenic_pressure_score, population_proxy
-        features = ["habitat_stress_index", "anthropogenic_pressure_score", "population_proxy"]
-        data_raw = df[features].values
-        
-        scaler = MinMaxScaler()
-        data_scaled = scaler.fit_transform(data_raw)
-        
-        # Given small dataset (yearly), we'll use a sequence length of 3
-        seq_length = 3
-        if len(data_scaled) <= seq_length:
-            print(f"Warning: Not enough data for {species_name}, skipping LSTM.")
-            continue
-            
-        # Prepare dataset for Evaluation
-        # Since data is small, we'll use the last 2 years for evaluation if possible
-        train_size = len(data_scaled) - 2
-        
-        if train_size > seq_length:
-            X_train, y_train = create_sequences(data_scaled[:train_size+seq_length], seq_length)
-            X_test, y_test = create_sequences(data_scaled[train_size:], seq_length)
-            is_valid_eval = len(X_test) > 0
-        else:
-            X_train, y_train = create_sequences(data_scaled, seq_length)
-            X_test, y_test = X_train, y_train
-            is_valid_eval = False
-
-        model = Sequential([
-            LSTM(32, activation='relu', input_shape=(seq_length, len(features))),
-            Dense(1)
-        ])
-        model.compile(optimizer='adam', loss='mse')
-        
-        # Train with more epochs for better accuracy
-        model.fit(X_train, y_train, epochs=100, verbose=0)
-        
-        mae, rmse, r2 = 0.1, 0.15, 0.88
-        
-        if is_valid_eval:
-            # Evaluate - set verbose=0 to avoid progbar issues
-            y_pred_scaled = model.predict(X_test, verbose=0)
-            
-            # Inverse transform for metrics
-            dummy_test = np.zeros((len(y_test), len(features)))
-            dummy_test[:, 2] = y_test
-            y_test_inv = scaler.inverse_transform(dummy_test)[:, 2]
-            
-            dummy_pred = np.zeros((len(y_pred_scaled), len(features)))
-            dummy_pred[:, 2] = y_pred_scaled.flatten()
-            y_pred_inv = scaler.inverse_transform(dummy_pred)[:, 2]
-            
-            mae = float(np.mean(np.abs(y_test_inv - y_pred_inv)))
-            rmse = float(np.sqrt(np.mean((y_test_inv - y_pred_inv)**2)))
-            # Handle R2 for single point
-            if len(y_test_inv) > 1:
-                ss_res = np.sum((y_test_inv - y_pred_inv)**2)
-                ss_tot = np.sum((y_test_inv - np.mean(y_test_inv))**2)
-                r2 = float(1 - (ss_res / ss_tot)) if ss_tot != 0 else 0.88
-            else:
-                r2 = 0.92
-        
-        # Final Train on all data for forecast
-        X_all, y_all = create_sequences(data_scaled, seq_length)
-        model.fit(X_all, y_all, epochs=50, verbose=0)
-
-        # Forecast 10 years
-        current_batch = data_scaled[-seq_length:].reshape(1, seq_length, len(features))
-        future_pop_scaled = []
-        
-        # Simple trend extrapolation for other features to feed into LSTM
-        stress_trend = np.polyfit(range(len(df)), df["habitat_stress_index"], 1)
-        anthro_trend = np.polyfit(range(len(df)), df["anthropogenic_pressure_score"], 1)
-        
-        for i in range(1, 11):
-            pred = model.predict(current_batch)[0]
-            future_pop_scaled.append(pred[0])
-            
-            # Update batch for next prediction
-            next_year = len(df) + i
-            next_stress = np.clip(stress_trend[0] * next_year + stress_trend[1], 0, 1)
-            next_anthro = np.clip(anthro_trend[0] * next_year + anthro_trend[1], 0, 1)
-            
-            # Scale next features
-            placeholder = np.zeros((1, 3))
-            placeholder[0, 0] = next_stress
-            placeholder[0, 1] = next_anthro
-            placeholder[0, 2] = pred[0] 
-            next_features_scaled = scaler.transform(placeholder)[0]
-            
-            new_val = np.array([next_features_scaled[0], next_features_scaled[1], pred[0]]).reshape(1, 1, len(features))
-            current_batch = np.append(current_batch[:, 1:, :], new_val, axis=1)
-            
-        # Inverse transform population
-        dummy = np.zeros((len(future_pop_scaled), len(features)))
-        dummy[:, 2] = future_pop_scaled
-        pred_pop = scaler.inverse_transform(dummy)[:, 2]
-        
-        # Prepare response
-        latest_pop = df["population_proxy"].iloc[-1]
-        risk_score = (df["habitat_stress_index"].iloc[-1] * 0.4 + 
-                      df["anthropogenic_pressure_score"].iloc[-1] * 0.4 + 
-                      (1 - min(1, pred_pop[-1]/latest_pop)) * 0.2)
-        risk_score = np.clip(risk_score, 0, 1)
-        
-        category = "Least Concern"
-        if risk_score > 0.8: category = "Critically Endangered"
-        elif risk_score > 0.6: category = "Endangered"
-        elif risk_score > 0.4: category = "Vulnerable"
-        elif risk_score > 0.2: category = "Near Threatened"
-        
-        forecasts[species_name] = {
-            "historical": {
-                "years": df["year"].tolist(),
-                "population": df["population_proxy"].tolist(),
-                "stress": df["habitat_stress_index"].tolist(),
-                "anthropogenic": df["anthropogenic_pressure_score"].tolist()
-            },
-            "forecast": {
-                "years": list(range(2025, 2035)),
-                "population": pred_pop.tolist(),
-                "stress": [float(np.clip(stress_trend[0] * (len(df)+i) + stress_trend[1], 0, 1)) for i in range(1, 11)],
-                "anthropogenic": [float(np.clip(anthro_trend[0] * (len(df)+i) + anthro_trend[1], 0, 1)) for i in range(1, 11)]
-            },
-            "risk_score": float(risk_score),
-            "predicted_category": category,
-            "confidence_interval": round(max(0, min(0.99, r2)), 2),
-            "evaluation": {
-                "mae": round(mae, 2),
-                "rmse": round(rmse, 2)
-            }
+    """Next-step training windows (X, y) on the population column, as zero-copy views."""
+    return sliding_windows(data, seq_length, target_col=2, horizon=1)
+
+def build_lstm(seq_length, n_features):
+    model = Sequential([
+        LSTM(32, activation='relu', input_shape=(seq_length, n_features)),
+        Dense(1)
+    ])
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+def load_species(path):
+    """Read and scale one species' series; returns None if it is too short for the LSTM."""
+    species_name = species_from_file(path)
+    df = read_species(path)
+    data_raw = df[FEATURES].values
+    
+    scaler = MinMaxScaler()
+    data_scaled = scaler.fit_transform(data_raw)
+    
+    if len(data_scaled) <= SEQ_LENGTH:
+        print(f"Warning: Not enough data for {species_name}, skipping LSTM.")
+        return None
+    return {"name": species_name, "df": df, "scaler": scaler, "data_scaled": data_scaled}
+
+def split_windows(data_scaled, seq_length=SEQ_LENGTH):
+    """Train/holdout windows; since data is small, the last 2 years are held out if possible."""
+    train_size = len(data_scaled) - 2
+    
+    if train_size > seq_length:
+        # Holdout windows end on the last 2 years; training windows never see them
+        X_train, y_train = create_sequences(data_scaled[:train_size], seq_length)
+        X_test, y_test = create_sequences(data_scaled[train_size-seq_length:], seq_length)
+        is_valid_eval = len(X_test) > 0
+    else:
+        X_train, y_train = create_sequences(data_scaled, seq_length)
+        X_test, y_test = X_train, y_train
+        is_valid_eval = False
+    return X_train, y_train, X_test, y_test, is_valid_eval
+
+def holdout_metrics(scaler, y_test, y_pred_scaled):
+    """MAE, RMSE and R2 of scaled holdout predictions, in population units."""
+    # Inverse transform for metrics
+    dummy_test = np.zeros((len(y_test), len(FEATURES)))
+    dummy_test[:, 2] = y_test
+    y_test_inv = scaler.inverse_transform(dummy_test)[:, 2]
+    
+    dummy_pred = np.zeros((len(y_pred_scaled), len(FEATURES)))
+    dummy_pred[:, 2] = np.asarray(y_pred_scaled).flatten()
+    y_pred_inv = scaler.inverse_transform(dummy_pred)[:, 2]
+    
+    mae = float(np.mean(np.abs(y_test_inv - y_pred_inv)))
+    rmse = float(np.sqrt(np.mean((y_test_inv - y_pred_inv)**2)))
+    # Handle R2 for single point
+    if len(y_test_inv) > 1:
+        ss_res = np.sum((y_test_inv - y_pred_inv)**2)
+        ss_tot = np.sum((y_test_inv - np.mean(y_test_inv))**2)
+        r2 = float(1 - (ss_res / ss_tot)) if ss_tot != 0 else 0.88
+    else:
+        r2 = 0.92
+    return mae, rmse, r2
+
+def species_exog(species):
+    """Trend fits and scaled exogenous rollout rows (trend scenario + Monte-Carlo draws)."""
+    df = species["df"]
+    
+    # Simple trend extrapolation for other features to feed into LSTM
+    years_idx = np.arange(len(df))
+    stress_trend = np.polyfit(years_idx, df["habitat_stress_index"], 1)
+    anthro_trend = np.polyfit(years_idx, df["anthropogenic_pressure_score"], 1)
+    
+    # Row 0 is the trend scenario; optional Monte-Carlo rows perturb the
+    # exogenous trends by their residual spread
+    noise = None
+    if ROLLOUT_SCENARIOS > 0:
+        resid_sd = [np.std(df[col].values - np.polyval(trend, years_idx))
+                    for col, trend in (("habitat_stress_index", stress_trend), ("anthropogenic_pressure_score", anthro_trend))]
+        rng = np.random.default_rng(42)
+        noise = np.concatenate([np.zeros((1, FORECAST_HORIZON, 2)), rng.normal(0, resid_sd, (ROLLOUT_SCENARIOS, FORECAST_HORIZON, 2))])
+    exog = trend_exog([stress_trend, anthro_trend], len(df), FORECAST_HORIZON, species["scaler"], noise=noise)
+    return stress_trend, anthro_trend, exog
+
+def forecast_entry(species, future_scaled, stress_trend, anthro_trend, mae, rmse, r2):
+    """JSON forecast entry for one species from its scaled rollout rows."""
+    df = species["df"]
+    
+    # Inverse transform population
+    dummy = np.zeros((future_scaled.size, len(FEATURES)))
+    dummy[:, 2] = future_scaled.ravel()
+    pred_all = species["scaler"].inverse_transform(dummy)[:, 2].reshape(future_scaled.shape)
+    pred_pop = pred_all[0]
+
+    # Prepare response
+    latest_pop = df["population_proxy"].iloc[-1]
+    risk_score = (df["habitat_stress_index"].iloc[-1] * 0.4 + 
+                  df["anthropogenic_pressure_score"].iloc[-1] * 0.4 + 
+                  (1 - min(1, pred_pop[-1]/latest_pop)) * 0.2)
+    risk_score = np.clip(risk_score, 0, 1)
+
+    category = "Least Concern"
+    if risk_score > 0.8: category = "Critically Endangered"
+    elif risk_score > 0.6: category = "Endangered"
+    elif risk_score > 0.4: category = "Vulnerable"
+    elif risk_score > 0.2: category = "Near Threatened"
+
+    return {
+        "historical": {
+            "years": df["year"].tolist(),
+            "population": df["population_proxy"].tolist(),
+            "stress": df["habitat_stress_index"].tolist(),
+            "anthropogenic": df["anthropogenic_pressure_score"].tolist()
+        },
+        "forecast": {
+            "years": list(range(2025, 2035)),
+            "population": pred_pop.tolist(),
+            **({"population_p10": np.percentile(pred_all, 10, axis=0).tolist(),
+                "population_p90": np.percentile(pred_all, 90, axis=0).tolist()} if ROLLOUT_SCENARIOS > 0 else {}),
+            "stress": [float(np.clip(stress_trend[0] * (len(df)+i) + stress_trend[1], 0, 1)) for i in range(1, 11)],
+            "anthropogenic": [float(np.clip(anthro_trend[0] * (len(df)+i) + anthro_trend[1], 0, 1)) for i in range(1, 11)]
+        },
+        "risk_score": float(risk_score),
+        "predicted_category": category,
+        "confidence_interval": round(max(0, min(0.99, r2)), 2),
+        "evaluation": {
+            "mae": round(mae, 2),
+            "rmse": round(rmse, 2)
         }
+    }
+
+def train_species_lstm(path):
+    """Train one species' LSTM and forecast 10 years; returns its forecast entry or None to skip it."""
+    species = load_species(path)
+    if species is None:
+        return None
+    print(f"Training LSTM model for {species['name']}...")
+    
+    X_train, y_train, X_test, y_test, is_valid_eval = split_windows(species["data_scaled"])
+    model = build_lstm(SEQ_LENGTH, len(FEATURES))
+    
+    # Train with more epochs for better accuracy
+    model.fit(X_train, y_train, epochs=100, verbose=0)
+    
+    mae, rmse, r2 = 0.1, 0.15, 0.88
+    if is_valid_eval:
+        # Evaluate - set verbose=0 to avoid progbar issues
+        mae, rmse, r2 = holdout_metrics(species["scaler"], y_test, model.predict(X_test, verbose=0))
+    
+    # Final Train on all data for forecast
+    X_all, y_all = create_sequences(species["data_scaled"], SEQ_LENGTH)
+    model.fit(X_all, y_all, epochs=50, verbose=0)
+    
+    # Forecast 10 years, all scenario rows together
+    stress_trend, anthro_trend, exog = species_exog(species)
+    windows = np.repeat(species["data_scaled"][-SEQ_LENGTH:][None], len(exog), axis=0)
+    future_scaled, step_seconds = rollout(model, windows, exog)
+    print(f"  Rollout for {species['name']}: {step_seconds.sum() * 1000:.1f} ms "
+          f"({step_seconds.mean() * 1000:.2f} ms/step, {len(exog)} series x {FORECAST_HORIZON} steps)")
+    
+    return forecast_entry(species, future_scaled, stress_trend, anthro_trend, mae, rmse, r2)
+
+def with_species_id(x, species_idx, n_species):
+    """Append a one-hot species ID to every timestep of x (..., seq, features).
+
+    `species_idx` is a single index, or one index per window when x is (n, seq, features).
+    """
+    onehot = np.eye(n_species, dtype=x.dtype)[species_idx]
+    if np.ndim(species_idx):
+        onehot = onehot[:, None, :]
+    onehot = np.broadcast_to(onehot, x.shape[:-1] + (n_species,))
+    return np.concatenate([x, onehot], axis=-1)
+
+def train_global_lstm(paths):
+    """One LSTM over every species' windows (plus a one-hot species ID), trained once.
+
+    Each species keeps its own scaler so targets share the [0, 1] range; the
+    holdout evaluation and the 10-year rollout for all species run as single
+    batched passes.
+    """
+    species_list = [s for s in (load_species(p) for p in paths) if s is not None]
+    if not species_list:
+        return {}
+    n_species = len(species_list)
+    n_inputs = len(FEATURES) + n_species
+    print(f"Training global LSTM model over {n_species} species...")
+    
+    splits = [split_windows(s["data_scaled"]) for s in species_list]
+    X_train = np.concatenate([with_species_id(sp[0], i, n_species) for i, sp in enumerate(splits)])
+    y_train = np.concatenate([sp[1] for sp in splits])
+    
+    model = build_lstm(SEQ_LENGTH, n_inputs)
+    model.fit(X_train, y_train, epochs=100, verbose=0)
+    
+    # Evaluate every species' holdout in one call, then split per species
+    evaluated = [i for i, sp in enumerate(splits) if sp[4]]
+    metrics = [(0.1, 0.15, 0.88)] * n_species
+    if evaluated:
+        X_test = np.concatenate([with_species_id(splits[i][2], i, n_species) for i in evaluated])
+        y_pred = np.asarray(model(X_test.astype(np.float32), training=False)).ravel()
+        offset = 0
+        for i in evaluated:
+            n = len(splits[i][2])
+            metrics[i] = holdout_metrics(species_list[i]["scaler"], splits[i][3], y_pred[offset:offset + n])
+            offset += n
+    
+    # Final Train on all data for forecast (windows never cross species)
+    X_all, y_all, species_idx = stacked_windows([s["data_scaled"] for s in species_list], SEQ_LENGTH, target_col=2)
+    X_all = with_species_id(X_all, species_idx, n_species)
+    model.fit(X_all, y_all, epochs=50, verbose=0)
+    
+    # Forecast every species (and scenario) in one batched rollout
+    trends, windows, exogs = [], [], []
+    for i, species in enumerate(species_list):
+        stress_trend, anthro_trend, exog = species_exog(species)
+        trends.append((stress_trend, anthro_trend))
+        exogs.append(with_species_id(exog, i, n_species))
+        windows.append(np.repeat(with_species_id(species["data_scaled"][-SEQ_LENGTH:], i, n_species)[None], len(exog), axis=0))
+    future_scaled, step_seconds = rollout(model, np.concatenate(windows), np.concatenate(exogs))
+    print(f"  Rollout for {n_species} species: {step_seconds.sum() * 1000:.1f} ms "
+          f"({step_seconds.mean() * 1000:.2f} ms/step, {len(future_scaled)} series x {FORECAST_HORIZON} steps)")
+    
+    forecasts = {}
+    rows = np.cumsum([0] + [len(w) for w in windows])
+    for i, species in enumerate(species_list):
+        stress_trend, anthro_trend = trends[i]
+        mae, rmse, r2 = metrics[i]
+        forecasts[species["name"]] = forecast_entry(species, future_scaled[rows[i]:rows[i + 1]],
+                                                    stress_trend, anthro_trend, mae, rmse, r2)
+    return dict(sorted(forecasts.items()))
+
+def run_lstm(paths, mode, workers=None):
+    if mode == "global":
+        return train_global_lstm(paths)
+    
+    # Species are independent: train them in parallel worker processes
+    forecasts, failures = train_species_parallel(train_species_lstm, paths, workers=workers)
+    if failures:
+        print(f"Warning: {len(failures)} species failed: {', '.join(failures)}")
+    return forecasts
+
+def species_paths():
+    return species_sources(PROCESSED_DATA_DIR)
+
+def train_and_forecast_lstm(workers=None, mode=None):
+    """Train and forecast every species; mode is "per-species" (default) or "global"."""
+    mode = mode or LSTM_MODE
+    forecasts = run_lstm(species_paths(), mode, workers=workers)
 
     # Save all forecasts
     output_path = os.path.join(MODEL_OUTPUT_DIR, "wildlife_forecast.json")
     with open(output_path, "w") as f:
         json.dump(forecasts, f, indent=4)
     
-    print(f"LSTM Forecasting complete. Saved to {output_path}")
+    print(f"LSTM Forecasting complete ({mode}). Saved to {output_path}")
+
+def benchmark_modes(workers=None):
+    """Compare wall time and mean holdout MAE/RMSE of per-species vs global training."""
+    paths = species_paths()
+    rows = []
+    for mode in ["per-species", "global"]:
+        started = time.perf_counter()
+        forecasts = run_lstm(paths, mode, workers=workers)
+        elapsed = time.perf_counter() - started
+        mae = np.mean([f["evaluation"]["mae"] for f in forecasts.values()]) if forecasts else float("nan")
+        rmse = np.mean([f["evaluation"]["rmse"] for f in forecasts.values()]) if forecasts else float("nan")
+        rows.append((mode, elapsed, mae, rmse, len(forecasts)))
+    
+    print(f"\n{'mode':<12}{'wall_s':>10}{'mean_mae':>12}{'mean_rmse':>12}{'species':>9}")
+    for mode, elapsed, mae, rmse, n in rows:
+        print(f"{mode:<12}{elapsed:>10.1f}{mae:>12.2f}{rmse:>12.2f}{n:>9}")
 
 if __name__ == "__main__":
-    train_and_forecast_lstm()
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+    mode = sys.argv[sys.argv.index("--mode") + 1] if "--mode" in sys.argv else None
+    if "--benchmark" in sys.argv:
+        benchmark_modes(workers=workers)
+    else:
+        train_and_forecast_lstm(workers=workers, mode=mode)
@@ -1,11 +1,14 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 import json
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from parallel_training import species_from_file, train_species_parallel
+from species_data import read_species, species_sources
 
 # Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,80 +17,84 @@ PROCESSED_DATA_DIR = os.path.join(BACKEND_DIR, "datasets", "wildlife_processed")
 MODEL_OUTPUT_DIR = SCRIPT_DIR
 os.makedirs(MODEL_OUTPUT_DIR, exist_ok=True)
 
-def train_and_forecast_simple():
-    forecasts = {}
-    files = [f for f in os.listdir(PROCESSED_DATA_DIR) if f.endswith("_time_series.csv")]
+def train_species_simple(path):
+    """Fit and forecast one species; returns its forecast entry or None to skip it."""
+    species_name = species_from_file(path)
+    print(f"Training model for {species_name}...")
+    
+    df = read_species(path)
+    
+    # Features: habitat_stress_index, anthropogenic_pressure_score, population_proxy
+    features = ["habitat_stress_index", "anthropogenic_pressure_score", "population_proxy"]
+    
+    if not all(col in df.columns for col in features):
+        print(f"Warning: Missing required columns for {species_name}, skipping.")
+        return None
+        
+    data_raw = df[features].values
+    
+    if len(data_raw) < 3:
+        print(f"Warning: Not enough data for {species_name}, skipping.")
+        return None
+    
+    # Prepare training data
+    X = np.arange(len(data_raw)).reshape(-1, 1)  # Time as feature
+    y = data_raw[:, 2]  # Population proxy
+    
+    # Train Random Forest model
+    model = RandomForestRegressor(n_estimators=100, random_state=42)
+    model.fit(X, y)
+    
+    # Calculate metrics
+    y_pred = model.predict(X)
+    mae = float(mean_absolute_error(y, y_pred))
+    rmse = float(np.sqrt(mean_squared_error(y, y_pred)))
+    r2 = float(r2_score(y, y_pred))
+    
+    # Forecast 10 years into the future
+    last_year = df['year'].max() if 'year' in df.columns else 2026
+    future_years = np.arange(len(data_raw), len(data_raw) + 10).reshape(-1, 1)
+    future_predictions = model.predict(future_years)
     
-    if not files:
+    # Ensure predictions are within reasonable bounds
+    future_predictions = np.clip(future_predictions, y.min() * 0.5, y.max() * 1.5)
+    
+    forecast_data = []
+    for i, pred in enumerate(future_predictions):
+        forecast_data.append({
+            "year": int(last_year + i + 1),
+            "predicted_population": float(pred),
+            "confidence_lower": float(pred * 0.85),
+            "confidence_upper": float(pred * 1.15)
+        })
+    
+    print(f"  → Forecast complete for {species_name} (R²: {r2:.3f})")
+    return {
+        "species": species_name,
+        "forecast": forecast_data,
+        "metrics": {
+            "mae": mae,
+            "rmse": rmse,
+            "r2_score": r2
+        },
+        "status": "declining" if future_predictions[-1] < y[-1] else "stable",
+        "trend": "downward" if np.mean(np.diff(future_predictions)) < 0 else "upward"
+    }
+
+def train_and_forecast_simple(workers=None):
+    paths = species_sources(PROCESSED_DATA_DIR)
+    
+    if not paths:
         print("No processed wildlife data found. Creating sample forecast...")
         # Generate sample data
         forecasts = generate_sample_forecast()
         save_forecast(forecasts)
         return
     
-    for file in files:
-        species_name = file.replace("_time_series.csv", "").replace("_", " ").title()
-        print(f"Training model for {species_name}...")
-        
-        df = pd.read_csv(os.path.join(PROCESSED_DATA_DIR, file))
-        
-        # Features: habitat_stress_index, anthropogenic_pressure_score, population_proxy
-        features = ["habitat_stress_index", "anthropogenic_pressure_score", "population_proxy"]
-        
-        if not all(col in df.columns for col in features):
-            print(f"Warning: Missing required columns for {species_name}, skipping.")
-            continue
-            
-        data_raw = df[features].values
-        
-        if len(data_raw) < 3:
-            print(f"Warning: Not enough data for {species_name}, skipping.")
-            continue
-        
-        # Prepare training data
-        X = np.arange(len(data_raw)).reshape(-1, 1)  # Time as feature
-        y = data_raw[:, 2]  # Population proxy
-        
-        # Train Random Forest model
-        model = RandomForestRegressor(n_estimators=100, random_state=42)
-        model.fit(X, y)
-        
-        # Calculate metrics
-        y_pred = model.predict(X)
-        mae = float(mean_absolute_error(y, y_pred))
-        rmse = float(np.sqrt(mean_squared_error(y, y_pred)))
-        r2 = float(r2_score(y, y_pred))
-        
-        # Forecast 10 years into the future
-        last_year = df['year'].max() if 'year' in df.columns else 2026
-        future_years = np.arange(len(data_raw), len(data_raw) + 10).reshape(-1, 1)
-        future_predictions = model.predict(future_years)
-        
-        # Ensure predictions are within reasonable bounds
-        future_predictions = np.clip(future_predictions, y.min() * 0.5, y.max() * 1.5)
-        
-        forecast_data = []
-        for i, pred in enumerate(future_predictions):
-            forecast_data.append({
-                "year": int(last_year + i + 1),
-                "predicted_population": float(pred),
-                "confidence_lower": float(pred * 0.85),
-                "confidence_upper": float(pred * 1.15)
-            })
-        
-        forecasts[species_name] = {
-            "species": species_name,
-            "forecast": forecast_data,
-            "metrics": {
-                "mae": mae,
-                "rmse": rmse,
-                "r2_score": r2
-            },
-            "status": "declining" if future_predictions[-1] < y[-1] else "stable",
-            "trend": "downward" if np.mean(np.diff(future_predictions)) < 0 else "upward"
-        }
-        
-        print(f"  → Forecast complete for {species_name} (R²: {r2:.3f})")
+    # Species are independent: train them in parallel worker processes
+    forecasts, failures = train_species_parallel(train_species_simple, paths, workers=workers)
+    if failures:
+        print(f"Warning: {len(failures)} species failed: {', '.join(failures)}")
     
     # If no forecasts were generated, create sample data
     if not forecasts:
@@ -165,6 +172,7 @@ if __name__ == "__main__":
     print("=" * 60)
     print("Wildlife Population Forecasting (Simplified)")
     print("=" * 60)
-    train_and_forecast_simple()
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+    train_and_forecast_simple(workers=workers)
     print("=" * 60)
     print("Forecasting complete!")
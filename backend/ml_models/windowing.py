@@ -0,0 +1,78 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(data, seq_length, target_col=2, horizon=1):
+    """(X, y) training windows over a (time, features) array, as zero-copy views.
+
+    X[i] = data[i : i + seq_length] and y[i] = data[i + seq_length + horizon - 1, target_col],
+    so horizon=1 reproduces the classic "predict the next step" loop.
+    X has shape (n, seq_length, n_features) and y shape (n,); both are
+    read-only views into `data`.
+    """
+    data = np.asarray(data)
+    n = len(data) - seq_length - horizon + 1
+    if n <= 0:
+        return np.empty((0, seq_length) + data.shape[1:], dtype=data.dtype), np.empty(0, dtype=data.dtype)
+
+    # sliding_window_view puts the window axis last: (starts, features, seq) -> (starts, seq, features)
+    X = np.moveaxis(sliding_window_view(data, seq_length, axis=0), -1, 1)[:n]
+    first_target = seq_length + horizon - 1
+    y = data[first_target:first_target + n, target_col]
+    return X, y
+
+
+def stacked_windows(series_list, seq_length, target_col=2, horizon=1):
+    """Windows over several series at once, never crossing a series boundary.
+
+    The series are concatenated once and windowed with a single view; only
+    window starts that lie entirely inside one series (including the target
+    step) are kept. Returns (X, y, series_idx) where series_idx[i] is the
+    position in `series_list` that window i came from.
+    """
+    series_list = [np.asarray(s) for s in series_list]
+    lengths = np.array([len(s) for s in series_list])
+    if not len(series_list) or lengths.sum() == 0:
+        empty = np.empty((0, seq_length) + (series_list[0].shape[1:] if series_list else ()))
+        return empty, np.empty(0), np.empty(0, dtype=np.intp)
+
+    data = np.concatenate(series_list)
+    X, y = sliding_windows(data, seq_length, target_col, horizon)
+
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    series_idx = np.repeat(np.arange(len(series_list)), lengths)[:len(X)]
+    starts = np.arange(len(X))
+    # window span [start, start + seq_length + horizon - 1] must end inside its own series
+    valid = starts + seq_length + horizon - 1 < offsets[series_idx + 1]
+    return X[valid], y[valid], series_idx[valid]
+
+
+def _reference_sequences(data, seq_length):
+    """The original list-append implementation, kept for parity checks."""
+    xs, ys = [], []
+    for i in range(len(data) - seq_length):
+        xs.append(data[i:(i + seq_length)])
+        ys.append(data[i + seq_length, 2])
+    return np.array(xs), np.array(ys)
+
+
+if __name__ == "__main__":
+    # Parity check against the original create_sequences loop
+    rng = np.random.default_rng(0)
+    for length in [2, 3, 4, 10, 57]:
+        for seq_length in [1, 3, 5]:
+            data = rng.random((length, 3))
+            X, y = sliding_windows(data, seq_length)
+            X_ref, y_ref = _reference_sequences(data, seq_length)
+            if len(X_ref):
+                assert np.array_equal(X, X_ref) and np.array_equal(y, y_ref), (length, seq_length)
+            else:
+                assert len(X) == 0 and len(y) == 0
+
+    series = [rng.random((n, 3)) for n in [10, 2, 7, 4]]
+    X, y, idx = stacked_windows(series, 3)
+    expected = [_reference_sequences(s, 3) for s in series]
+    assert np.array_equal(X, np.concatenate([e[0] for e in expected if len(e[0])]))
+    assert np.array_equal(y, np.concatenate([e[1] for e in expected if len(e[1])]))
+    assert list(idx) == [k for k, e in enumerate(expected) for _ in range(len(e[0]))]
+    print("windowing: sliding_windows and stacked_windows match the reference loop")
@@ -0,0 +1,127 @@
+import sqlite3
+from datetime import datetime
+
+# NASA POWER marks days it has no data for yet with this fill value
+POWER_FILL_VALUE = -999.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS climate_daily (
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    date TEXT NOT NULL,
+    t2m REAL,
+    prectotcorr REAL,
+    PRIMARY KEY (lat, lon, date)
+);
+CREATE TABLE IF NOT EXISTS species_counts (
+    species TEXT NOT NULL,
+    fetched_on TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (species, fetched_on)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    source TEXT NOT NULL,
+    key TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (source, key)
+);
+"""
+
+
+class RawStore:
+    """Persistent SQLite cache of raw ingested data with per-source watermarks.
+
+    Watermarks record how far each (source, key) has been successfully
+    ingested: the last stored day for NASA POWER, the fetch date for GBIF
+    counts. Ingestion asks for the watermark, fetches only what is newer
+    and merges it in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def watermark(self, source, key):
+        row = self.conn.execute(
+            "SELECT watermark FROM watermarks WHERE source = ? AND key = ?", (source, key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_watermark(self, source, key, watermark):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO watermarks (source, key, watermark, updated_at) VALUES (?, ?, ?, ?)",
+            (source, key, watermark, datetime.now().isoformat(timespec="seconds"))
+        )
+
+    # NASA POWER daily climate
+    @staticmethod
+    def climate_key(lat, lon):
+        return f"{lat:.2f},{lon:.2f}"
+
+    def merge_climate(self, lat, lon, power_payload):
+        """Upsert a POWER daily payload; the watermark advances to the last day with real data."""
+        params = (power_payload or {}).get("properties", {}).get("parameter", {})
+        t2m = params.get("T2M", {})
+        rain = params.get("PRECTOTCORR", {})
+        rows = []
+        last_valid = None
+        for date in sorted(set(t2m) | set(rain)):
+            t, r = t2m.get(date), rain.get(date)
+            if t == POWER_FILL_VALUE or r == POWER_FILL_VALUE or t is None or r is None:
+                continue
+            rows.append((lat, lon, date, t, r))
+            last_valid = date
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO climate_daily (lat, lon, date, t2m, prectotcorr) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            if last_valid:
+                previous = self.watermark("nasa_power", self.climate_key(lat, lon))
+                self._set_watermark("nasa_power", self.climate_key(lat, lon), max(last_valid, previous or last_valid))
+        return len(rows)
+
+    def climate_payload(self, lat, lon):
+        """Everything stored for a point, in the NASA POWER JSON shape."""
+        rows = self.conn.execute(
+            "SELECT date, t2m, prectotcorr FROM climate_daily WHERE lat = ? AND lon = ? ORDER BY date", (lat, lon)
+        ).fetchall()
+        if not rows:
+            return None
+        return {
+            "properties": {
+                "parameter": {
+                    "T2M": {d: t for d, t, _ in rows},
+                    "PRECTOTCORR": {d: r for d, _, r in rows},
+                }
+            }
+        }
+
+    # GBIF occurrence counts
+    def merge_species_count(self, species, count, fetched_on):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO species_counts (species, fetched_on, count) VALUES (?, ?, ?)",
+                (species, fetched_on, int(count))
+            )
+            self._set_watermark("gbif", species, fetched_on)
+
+    def latest_species_count(self, species):
+        row = self.conn.execute(
+            "SELECT count FROM species_counts WHERE species = ? ORDER BY fetched_on DESC LIMIT 1", (species,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def freshness(self):
+        """Per-source summary: number of keys, oldest/newest watermark and last update."""
+        rows = self.conn.execute(
+            "SELECT source, COUNT(*), MIN(watermark), MAX(watermark), MAX(updated_at) FROM watermarks GROUP BY source"
+        ).fetchall()
+        return {
+            source: {"keys": n, "oldest_watermark": lo, "newest_watermark": hi, "last_updated": updated}
+            for source, n, lo, hi, updated in rows
+        }
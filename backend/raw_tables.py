@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+MANIFEST_NAME = "manifest.json"
+
+# Column order and dtypes of every raw table; preprocessing selects from these
+TABLE_SCHEMAS = {
+    "species_occurrences": {"species": "string", "count": "int64"},
+    "conservation_status": {"species": "string", "status": "string", "trend": "string"},
+    "climate_daily": {"date": "datetime64[ns]", "t2m": "float64", "prectotcorr": "float64"},
+    "forest_loss": {"year": "int64", "loss_ha": "float64"},
+    "human_population": {"year": "int64", "density": "float64"},
+}
+
+
+def _typed(df, name):
+    schema = TABLE_SCHEMAS[name]
+    if df.empty:
+        df = pd.DataFrame(columns=list(schema))
+    return df[list(schema)].astype(schema).reset_index(drop=True)
+
+
+def climate_frame(power_payload):
+    """NASA POWER daily JSON -> one row per day (date, t2m, prectotcorr)."""
+    params = (power_payload or {}).get("properties", {}).get("parameter", {})
+    df = pd.DataFrame({"t2m": params.get("T2M", {}), "prectotcorr": params.get("PRECTOTCORR", {})})
+    df.index = pd.to_datetime(df.index, format="%Y%m%d")
+    return df.rename_axis("date").reset_index().sort_values("date")
+
+
+def raw_tables(all_data):
+    """Split the ingested dict into one typed DataFrame per source."""
+    status = pd.DataFrame.from_dict(all_data["conservation_status"], orient="index")
+    status = status.rename_axis("species").reset_index()
+    return {
+        "species_occurrences": _typed(pd.DataFrame(all_data["species_occurrences"]), "species_occurrences"),
+        "conservation_status": _typed(status, "conservation_status"),
+        "climate_daily": _typed(climate_frame(all_data["climate_data"]), "climate_daily"),
+        "forest_loss": _typed(pd.DataFrame(all_data["forest_loss"]), "forest_loss"),
+        "human_population": _typed(pd.DataFrame(all_data["human_population"]), "human_population"),
+    }
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_raw_tables(all_data, out_dir):
+    """Write each source as its own Parquet file (JSON lines without pyarrow) plus a manifest.
+
+    Tables are written to temp files and swapped in, and the manifest is
+    replaced last, so a reader never sees a half-written set.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    fmt = "parquet" if pq is not None else "jsonl"
+    manifest = {
+        "format": fmt,
+        "ingested_at": all_data.get("timestamp"),
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+        "freshness": all_data.get("freshness", {}),
+        "tables": {},
+    }
+    for name, df in raw_tables(all_data).items():
+        filename = f"{name}.{fmt}"
+        path = os.path.join(out_dir, filename)
+        tmp_path = path + ".tmp"
+        if fmt == "parquet":
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        else:
+            df.to_json(tmp_path, orient="records", lines=True, date_format="iso")
+        os.replace(tmp_path, path)
+        manifest["tables"][name] = {
+            "file": filename,
+            "rows": len(df),
+            "columns": {col: str(dtype) for col, dtype in df.dtypes.items()},
+            "bytes": os.path.getsize(path),
+            "sha256": _file_sha256(path),
+        }
+
+    tmp_path = os.path.join(out_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+def load_manifest(raw_dir):
+    path = os.path.join(raw_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def read_table(raw_dir, name, columns=None, manifest=None):
+    """Load one raw table, optionally only some columns (Parquet files are memory-mapped)."""
+    manifest = manifest or load_manifest(raw_dir)
+    if manifest is None or name not in manifest["tables"]:
+        raise FileNotFoundError(f"No raw table '{name}' in {raw_dir}")
+    entry = manifest["tables"][name]
+    path = os.path.join(raw_dir, entry["file"])
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise ImportError("pyarrow is required to read Parquet raw tables")
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    df = pd.read_json(path, orient="records", lines=True)
+    if df.empty:
+        df = pd.DataFrame(columns=list(entry["columns"]))
+    df = df.astype(entry["columns"])
+    return df[columns] if columns is not None else df
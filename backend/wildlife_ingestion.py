@@ -1,14 +1,29 @@
-import requests
-import json
+import asyncio
 import os
 import time
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from ingestion_client import AsyncFetcher
+from raw_store import RawStore
+from raw_tables import write_raw_tables
 
 # Configuration
 RAW_DATA_DIR = "backend/datasets/wildlife_raw"
 os.makedirs(RAW_DATA_DIR, exist_ok=True)
 
+# Upstream endpoints (overridable to point at local stub servers)
+GBIF_API_URL = os.getenv("GBIF_API_URL", "https://api.gbif.org/v1").rstrip("/")
+NASA_POWER_URL = os.getenv("NASA_POWER_URL", "https://power.larc.nasa.gov/api").rstrip("/")
+# Concurrent requests allowed per upstream host
+INGEST_PER_HOST = int(os.getenv("INGEST_PER_HOST", 8))
+HTTP_CACHE_PATH = os.path.join(RAW_DATA_DIR, "http_cache.json")
+
+# Incremental ingestion: raw data persists here between runs
+RAW_STORE_PATH = os.path.join(RAW_DATA_DIR, "raw_store.sqlite")
+# GBIF counts are re-fetched once they are this many days old
+GBIF_REFRESH_DAYS = int(os.getenv("GBIF_REFRESH_DAYS", 1))
+CLIMATE_POINT = (21.95, 88.70)
+
 # Species of interest
 SPECIES_LIST = [
     {"name": "Panthera tigris", "common_name": "Royal Bengal Tiger"},
@@ -18,18 +33,14 @@ SPECIES_LIST = [
     {"name": "Axis axis", "common_name": "Spotted Deer"}
 ]
 
-def fetch_gbif_data(species_name):
+async def fetch_gbif_data(client, species_name):
     """Fetch species occurrence counts from GBIF."""
     print(f"Fetching GBIF data for {species_name}...")
-    url = f"https://api.gbif.org/v1/occurrence/search?country=IN&stateProvince=Sundarbans&scientificName={species_name}&limit=0"
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return {"count": data.get("count", 0), "species": species_name}
-    except Exception as e:
-        print(f"Error fetching GBIF data: {e}")
-    return {"count": 0, "species": species_name}
+    url = f"{GBIF_API_URL}/occurrence/search?country=IN&stateProvince=Sundarbans&scientificName={species_name}&limit=0"
+    data = await client.get_json(url, timeout=10)
+    if data is not None:
+        return {"count": data.get("count", 0), "species": species_name}
+    return None
 
 def fetch_iucn_status(species_name):
     """Fetch IUCN status. (Requires token, using mock for demo if no token)"""
@@ -45,21 +56,16 @@ def fetch_iucn_status(species_name):
     }
     return mock_status.get(species_name, {"status": "DD", "trend": "Unknown"})
 
-def fetch_climate_data(lat=21.95, lon=88.70):
-    """Fetch climate data from NASA POWER API."""
-    print(f"Fetching NASA POWER climate data...")
-    # Fetch for the last 5 years
+async def fetch_climate_data(client, lat=CLIMATE_POINT[0], lon=CLIMATE_POINT[1], start_date=None):
+    """Fetch climate data from NASA POWER API (from start_date, default the last 5 years)."""
     end_date = datetime.now().strftime("%Y%m%d")
-    start_date = (datetime.now().replace(year=datetime.now().year - 5)).strftime("%Y%m%d")
+    if start_date is None:
+        start_date = (datetime.now().replace(year=datetime.now().year - 5)).strftime("%Y%m%d")
+    print(f"Fetching NASA POWER climate data {start_date}-{end_date}...")
     
-    url = f"https://power.larc.nasa.gov/api/temporal/daily/point?parameters=T2M,PRECTOTCORR&community=AG&longitude={lon}&latitude={lat}&start={start_date}&end={end_date}&format=JSON"
-    try:
-        response = requests.get(url, timeout=15)
-        if response.status_code == 200:
-            return response.json()
-    except Exception as e:
-        print(f"Error fetching NASA data: {e}")
-    return None
+    url = f"{NASA_POWER_URL}/temporal/daily/point?parameters=T2M,PRECTOTCORR&community=AG&longitude={lon}&latitude={lat}&start={start_date}&end={end_date}&format=JSON"
+    # The window ends today, so the URL differs every run: nothing to revalidate
+    return await client.get_json(url, timeout=15, cache=False)
 
 def fetch_forest_loss():
     """Mock Global Forest Watch Data for Sundarbans (2010-2024)."""
@@ -94,7 +100,23 @@ def fetch_human_pop():
     ]
     return data
 
-def ingest_all():
+def species_due(store, species_list, today):
+    """Species never fetched, or whose last GBIF fetch is GBIF_REFRESH_DAYS old."""
+    due = []
+    for species in species_list:
+        watermark = store.watermark("gbif", species["name"])
+        if watermark is None or (today - datetime.strptime(watermark, "%Y-%m-%d")).days >= GBIF_REFRESH_DAYS:
+            due.append(species)
+    return due
+
+def climate_start(store, lat, lon):
+    """Day after the last stored POWER day, or None for a full backfill."""
+    watermark = store.watermark("nasa_power", RawStore.climate_key(lat, lon))
+    if watermark is None:
+        return None
+    return (datetime.strptime(watermark, "%Y%m%d") + timedelta(days=1)).strftime("%Y%m%d")
+
+async def ingest_all_async(species_list=SPECIES_LIST, store_path=RAW_STORE_PATH):
     all_data = {
         "species_occurrences": [],
         "conservation_status": {},
@@ -104,21 +126,62 @@ def ingest_all():
         "timestamp": datetime.now().isoformat()
     }
 
-    for species in SPECIES_LIST:
-        occ = fetch_gbif_data(species["name"])
-        all_data["species_occurrences"].append(occ)
-        
-        status = fetch_iucn_status(species["name"])
-        all_data["conservation_status"][species["name"]] = status
-        
-    all_data["climate_data"] = fetch_climate_data()
-
-    # Save to JSON
-    output_path = os.path.join(RAW_DATA_DIR, "ingested_wildlife_data.json")
-    with open(output_path, "w") as f:
-        json.dump(all_data, f, indent=4)
-    
-    print(f"Data ingestion complete. Saved to {output_path}")
+    store = RawStore(store_path)
+    today = datetime.now()
+    lat, lon = CLIMATE_POINT
+    try:
+        # Only fetch what is new since the last successful run
+        due = species_due(store, species_list, today)
+        start_date = climate_start(store, lat, lon)
+        fetch_climate = start_date is None or start_date <= today.strftime("%Y%m%d")
+        print(f"GBIF: {len(due)}/{len(species_list)} species due; "
+              f"NASA POWER: {'from ' + start_date if start_date else 'full backfill' if fetch_climate else 'up to date'}")
+
+        # All upstream calls run concurrently (bounded per host) over one pooled
+        # session, with a thread per allowed request on each of GBIF and POWER
+        client = AsyncFetcher(per_host=INGEST_PER_HOST, max_workers=INGEST_PER_HOST * 2, cache_path=HTTP_CACHE_PATH)
+        try:
+            started = time.perf_counter()
+            occurrences, climate = await asyncio.gather(
+                asyncio.gather(*(fetch_gbif_data(client, species["name"]) for species in due)),
+                fetch_climate_data(client, lat, lon, start_date=start_date) if fetch_climate else asyncio.sleep(0)
+            )
+            print(f"Fetched {len(due)} species + climate in {time.perf_counter() - started:.2f}s {client.stats}")
+        finally:
+            client.close()
+
+        # Merge new data in; failed fetches leave their watermark untouched
+        fetched_on = today.strftime("%Y-%m-%d")
+        for occ in occurrences:
+            if occ is not None:
+                store.merge_species_count(occ["species"], occ["count"], fetched_on)
+        if climate:
+            added = store.merge_climate(lat, lon, climate)
+            print(f"Stored {added} new climate days.")
+
+        for species in species_list:
+            count = store.latest_species_count(species["name"])
+            all_data["species_occurrences"].append({"count": count or 0, "species": species["name"]})
+            all_data["conservation_status"][species["name"]] = fetch_iucn_status(species["name"])
+        all_data["climate_data"] = store.climate_payload(lat, lon)
+
+        all_data["freshness"] = store.freshness()
+        for source, info in all_data["freshness"].items():
+            print(f"Freshness [{source}]: {info['keys']} keys, watermarks {info['oldest_watermark']}..{info['newest_watermark']}, "
+                  f"last updated {info['last_updated']}")
+    finally:
+        store.close()
+    return all_data
+
+def ingest_all():
+    all_data = asyncio.run(ingest_all_async())
+
+    # One typed table per source plus manifest.json, so readers load only what they need
+    manifest = write_raw_tables(all_data, RAW_DATA_DIR)
+    for name, table in manifest["tables"].items():
+        print(f"  {table['file']}: {table['rows']} rows, {table['bytes']} bytes")
+
+    print(f"Data ingestion complete. Saved {len(manifest['tables'])} {manifest['format']} tables to {RAW_DATA_DIR}")
 
 if __name__ == "__main__":
     ingest_all()
@@ -1,20 +1,60 @@
-import json
 import os
+import shutil
+import sys
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
+from raw_tables import load_manifest, read_table
+from climate_features import ANNUAL_COLUMNS, cached_climate_features, yearly_features
 
 # Configuration
-RAW_DATA_PATH = "backend/datasets/wildlife_raw/ingested_wildlife_data.json"
+RAW_DATA_DIR = "backend/datasets/wildlife_raw"
 PROCESSED_DATA_DIR = "backend/datasets/wildlife_processed"
+# Long-format dataset (one Parquet partition per species) written by --long
+SPECIES_DATASET_DIR = os.path.join(PROCESSED_DATA_DIR, "species_series")
+CLIMATE_CACHE_DIR = os.path.join(RAW_DATA_DIR, "cache")
 os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
 
-def load_data():
-    if not os.path.exists(RAW_DATA_PATH):
-        print(f"Error: {RAW_DATA_PATH} not found.")
+# Raw tables (and columns) preprocessing reads; the daily climate table is not needed here
+TABLES = {
+    "species_occurrences": ["species", "count"],
+    "conservation_status": ["species", "trend"],
+    "forest_loss": ["year", "loss_ha"],
+    "human_population": ["year", "density"],
+}
+
+def load_data(tables=TABLES):
+    manifest = load_manifest(RAW_DATA_DIR)
+    if manifest is None:
+        print(f"Error: no raw data manifest in {RAW_DATA_DIR}. Run wildlife_ingestion.py first.")
         return None
-    with open(RAW_DATA_PATH, "r") as f:
-        return json.load(f)
+    raw_data = {name: read_table(RAW_DATA_DIR, name, columns, manifest) for name, columns in tables.items()}
+    raw_data["manifest"] = manifest
+    return raw_data
+
+def load_climate(manifest):
+    """Annual and monthly POWER climate features, cached by the daily table's hash."""
+    if "climate_daily" not in manifest["tables"]:
+        return None, None
+    return cached_climate_features(
+        lambda: read_table(RAW_DATA_DIR, "climate_daily", manifest=manifest),
+        manifest["tables"]["climate_daily"]["sha256"],
+        CLIMATE_CACHE_DIR
+    )
+
+def environment_frame(raw_data):
+    """Yearly environmental features shared by every species."""
+    # Merge on year
+    df = pd.merge(raw_data["forest_loss"], raw_data["human_population"], on="year")
+    
+    # Climate features from the NASA POWER daily series; years it does not cover fall back to long-run values
+    annual, monthly = load_climate(raw_data["manifest"])
+    if annual is None:
+        annual = pd.DataFrame(columns=ANNUAL_COLUMNS, dtype="float64").astype({"year": "int64"})
+    else:
+        print(f"Climate: {len(annual)} observed years, {len(monthly)} months")
+        monthly.to_csv(os.path.join(PROCESSED_DATA_DIR, "climate_monthly.csv"), index=False)
+    return df.merge(yearly_features(df["year"], annual), on="year", how="left")
 
 def preprocess():
     raw_data = load_data()
@@ -22,37 +62,28 @@ def preprocess():
         return
 
     # Extract environmental features
-    forest_loss = pd.DataFrame(raw_data["forest_loss"])
-    human_pop = pd.DataFrame(raw_data["human_population"])
-    
-    # Merge on year
-    df = pd.merge(forest_loss, human_pop, on="year")
-    
-    # Extract climate features (averaging NASA data per year)
-    # For this demo, we'll synthesize realistic climate trends if NASA data is complex to parse
-    # because the NASA API returns daily data for a point.
-    df["avg_temp"] = [26.5, 26.8, 27.2, 27.0, 27.5, 27.9, 28.1, 28.3, 28.5, 28.8]
-    df["annual_rainfall"] = [1800, 1950, 2100, 1750, 2300, 2500, 1900, 2000, 2150, 2200]
-    df["cyclone_frequency"] = [1, 0, 1, 1, 2, 3, 1, 1, 2, 2] # Higher in 2020 (Amphan)
+    df = environment_frame(raw_data)
+    # Model readers prefer the long-format dataset, so drop a stale one
+    if os.path.isdir(SPECIES_DATASET_DIR):
+        shutil.rmtree(SPECIES_DATASET_DIR)
     
     # Extract species counts (Base counts for 2024 from GBIF)
     species_occurrences = raw_data["species_occurrences"]
+    trends = raw_data["conservation_status"].set_index("species")["trend"]
     
     # We will generate a time series for each species
-    for sp_occ in species_occurrences:
-        species_name = sp_occ["species"]
-        current_count = sp_occ["count"]
+    for species_name, current_count in zip(species_occurrences["species"], species_occurrences["count"]):
         if current_count == 0: current_count = 100 # Fallback for demo
         
         # Synthesize historical population (proxy) based on IUCN trend
-        trend = raw_data["conservation_status"].get(species_name, {}).get("trend", "Stable")
+        trend = trends.get(species_name, "Stable")
         
         population = []
         val = current_count
         factor = 0.95 if trend == "Decreasing" else 1.05 if trend == "Increasing" else 1.0
         
         # Work backwards from 2024
-        for _ in range(10):
+        for _ in range(len(df)):
             population.append(int(val))
             val = val / factor
         population.reverse()
@@ -61,7 +92,7 @@ def preprocess():
         sp_df["population_proxy"] = population
         
         # Add Poaching Risk (synthetic based on human density)
-        sp_df["poaching_risk"] = sp_df["density"] * 0.001 + np.random.normal(0, 0.05, 10)
+        sp_df["poaching_risk"] = sp_df["density"] * 0.001 + np.random.normal(0, 0.05, len(sp_df))
         
         # Feature Engineering: Habitat Stress Index
         # (normalized forest loss + temperature anomaly + cyclone freq)
@@ -81,5 +112,52 @@ def preprocess():
         sp_df.to_csv(os.path.join(PROCESSED_DATA_DIR, filename), index=False)
         print(f"Processed data for {species_name} saved to {filename}")
 
+def _group_minmax(df, groups, cols):
+    """Per-group min-max scaling (what a MinMaxScaler fit per species gives, constant columns -> 0)."""
+    lo = groups[cols].transform("min")
+    span = groups[cols].transform("max") - lo
+    return (df[cols] - lo) / span.replace(0, 1)
+
+def species_frame(raw_data, df):
+    """Every species in one long (species, year) frame, with the same columns preprocess() writes per species."""
+    occurrences = raw_data["species_occurrences"]
+    trends = occurrences["species"].map(raw_data["conservation_status"].set_index("species")["trend"]).fillna("Stable")
+    counts = occurrences["count"].where(occurrences["count"] != 0, 100).to_numpy(dtype=float) # Fallback for demo
+    factor = np.select([trends == "Decreasing", trends == "Increasing"], [0.95, 1.05], 1.0)
+    n_species, n_years = len(occurrences), len(df)
+
+    # Population proxy works backwards from the latest year: count / factor ** years_back
+    years_back = np.arange(n_years - 1, -1, -1)
+    population = (counts[:, None] / factor[:, None] ** years_back).astype(int)
+    # Same draws, in the same order, as the per-species loop
+    noise = np.random.normal(0, 0.05, (n_species, n_years))
+
+    long_df = df.iloc[np.tile(np.arange(n_years), n_species)].reset_index(drop=True)
+    long_df.insert(0, "species", np.repeat(occurrences["species"].to_numpy(), n_years))
+    long_df["population_proxy"] = population.ravel()
+    long_df["poaching_risk"] = long_df["density"] * 0.001 + noise.ravel()
+
+    groups = long_df.groupby("species", sort=False)
+    long_df["habitat_stress_index"] = _group_minmax(long_df, groups, ["loss_ha", "avg_temp", "cyclone_frequency"]).mean(axis=1)
+    long_df["anthropogenic_pressure_score"] = _group_minmax(long_df, groups, ["density", "poaching_risk"]).mean(axis=1)
+    long_df["species_key"] = long_df["species"].str.replace(" ", "_").str.lower()
+    return long_df
+
+def preprocess_long():
+    """Build all species at once and write one species-partitioned Parquet dataset."""
+    raw_data = load_data()
+    if not raw_data:
+        return
+
+    long_df = species_frame(raw_data, environment_frame(raw_data))
+    # Partitions are appended to, so replace the previous dataset wholesale
+    if os.path.isdir(SPECIES_DATASET_DIR):
+        shutil.rmtree(SPECIES_DATASET_DIR)
+    long_df.to_parquet(SPECIES_DATASET_DIR, partition_cols=["species_key"], index=False)
+    print(f"Processed {long_df['species'].nunique()} species ({len(long_df)} rows) into {SPECIES_DATASET_DIR}")
+
 if __name__ == "__main__":
-    preprocess()
+    if "--long" in sys.argv:
+        preprocess_long()
+    else:
+        preprocess()